@@ -8,28 +8,86 @@ Handles UUID generation, file-based polling, response parsing, and cleanup.
 Also provides skill installation commands for Claude Code integration.
 """
 
-import argparse
 import json
 import os
 import re
-import platform
-import shutil
-import subprocess
+import stat
 import sys
 import time
-import uuid
+from collections import deque
+from functools import lru_cache
+from itertools import count
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Dict,
+    Any,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    import argparse
+
+try:
+    # Optional: orjson parses and serializes raw bytes without an intermediate str
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        # Same compact UTF-8 output as orjson, rather than \uXXXX escapes
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
 
 # Constants
-UNITY_DIR = Path.cwd() / ".unity-bridge"
+# UNITY_DIR (Path.cwd() / ".unity-bridge") is resolved on first use; see _unity_dir()
+COMMAND_FILE_NAME = "command.json"
 DEFAULT_TIMEOUT = 30
-MIN_SLEEP = 0.1
+MIN_SLEEP = 0.01
 MAX_SLEEP = 1.0
-SLEEP_MULTIPLIER = 1.5
+SLEEP_MULTIPLIER = 1.3
+PARSE_RETRIES = 5  # Re-reads allowed when a response is caught mid-write
+PARSE_RETRY_DELAY = 0.01
 MIN_LIMIT = 1
 MAX_LIMIT = 1000
 BUILD_DEFAULT_TIMEOUT = 300  # 5 minutes default for builds
+WATCH_DEBOUNCE_MS = 50  # Max time to batch filesystem events when watching
+WATCH_STEP_MS = 2  # Event check granularity; also the quiet period before yielding
+# watchfiles only starts watching on the first wait, so a response written just
+# before that is caught by this periodic re-check rather than by an event
+WATCH_TIMEOUT_MS = 250
+TIMINGS_FILE = ".timings"  # Recent command round-trip times, used to pick the first poll delay
+TIMINGS_HISTORY = 10
+MAX_INITIAL_SLEEP = 0.1  # Upper bound on the adaptive first poll delay
+STATUS_CACHE_FILE = ".last-status.json"  # Last successful get-status, reused by health-check
+STATUS_CACHE_TTL = 2.0
+PIP_OUTPUT_TAIL_LINES = 100  # pip output kept for error reporting in quiet mode
+
+
+def _unity_dir() -> Path:
+    """
+    Return the project's .unity-bridge directory, resolving it on first use.
+
+    Deferring the lookup keeps getcwd() off the startup path of commands that
+    never touch the bridge directory. Tests may still patch UNITY_DIR.
+    """
+    unity_dir = globals().get("UNITY_DIR")
+    if unity_dir is None:
+        unity_dir = globals()["UNITY_DIR"] = Path.cwd() / ".unity-bridge"
+    return unity_dir
+
+
+def __getattr__(name: str) -> Any:
+    # Module-level access to UNITY_DIR resolves it lazily (PEP 562)
+    if name == "UNITY_DIR":
+        return _unity_dir()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def load_build_config(unity_bridge_dir: Path) -> Optional[Dict[str, Any]]:
@@ -47,7 +105,7 @@ def load_build_config(unity_bridge_dir: Path) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        return json.loads(config_file.read_text())
+        return _loads(config_file.read_bytes())
     except (json.JSONDecodeError, Exception):
         return None
 
@@ -76,99 +134,404 @@ class CommandTimeoutError(UnityCommandError):
     pass
 
 
+UUID_LENGTH = 36
 UUID_PATTERN = re.compile(
-    r"^[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}$"
+    r"[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}"
 )
 
 
+_command_ids = count()
+
+
+def _new_command_id() -> str:
+    """
+    Return a command id unique to this machine, in canonical UUID layout.
+
+    Built from the nanosecond clock, the process id and a per-process counter
+    rather than uuid4(), which costs an os.urandom() call per command. Response
+    filenames only need to be unique locally, not unpredictable.
+    """
+    raw = (
+        f"{time.time_ns() & 0xFFFFFFFFFFFFFFFF:016x}"
+        f"{os.getpid() & 0xFFFFFFFF:08x}{next(_command_ids) & 0xFFFFFFFF:08x}"
+    )
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+
 def _validate_command_id(command_id: str) -> None:
-    """Validate command_id is a proper UUID to prevent path traversal."""
-    if not UUID_PATTERN.match(command_id):
+    """Validate command_id is a proper UUID to prevent path traversal.
+
+    Only the canonical hyphenated form is accepted (``uuid.UUID`` would also
+    take braces and ``urn:uuid:`` prefixes, which aren't safe in filenames).
+    The length check rejects most malformed ids before the regex runs.
+    """
+    if len(command_id) != UUID_LENGTH or not UUID_PATTERN.fullmatch(command_id):
         raise UnityCommandError("Invalid command ID format")
 
 
-def check_gitignore_and_notify():
-    """Print a notice if .unity-bridge/ is not in .gitignore."""
+def check_gitignore_and_notify() -> bool:
+    """
+    Print a notice if .unity-bridge/ is not in .gitignore.
+
+    Returns:
+        True if .gitignore already covers the bridge directory.
+    """
     gitignore_path = Path.cwd() / ".gitignore"
 
-    if gitignore_path.exists():
-        try:
-            content = gitignore_path.read_text()
-            # Check for various patterns that would ignore the directory
-            if ".unity-bridge" in content:
-                return  # Already ignored
-        except Exception:
-            pass  # If we can't read gitignore, show the notice
+    try:
+        # Check for various patterns that would ignore the directory
+        if b".unity-bridge" in gitignore_path.read_bytes():
+            return True  # Already ignored
+    except Exception:
+        pass  # Missing or unreadable gitignore: show the notice
 
     print(
         "\nNote: Add '.unity-bridge/' to your .gitignore to avoid committing runtime files.\n",
         file=sys.stderr,
     )
+    return False
+
+
+# O_BINARY only exists on Windows, O_CLOEXEC only on POSIX
+_COMMAND_OPEN_FLAGS = (
+    os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_CLOEXEC", 0)
+)
+
+
+def _link_anonymous_file(target: Path, payload: bytes) -> bool:
+    """
+    Write payload to an unnamed O_TMPFILE inode and link it into place as target.
+
+    No temp file is ever visible in the directory, and target appears only
+    once it is complete. Linux only.
+
+    Returns:
+        True if target was created; False if O_TMPFILE isn't supported here or
+        target already exists, in which case the caller should fall back to a
+        temp file + rename.
+    """
+    if sys.platform != "linux" or not hasattr(os, "O_TMPFILE"):
+        return False
+    try:
+        fd = os.open(target.parent, os.O_TMPFILE | os.O_WRONLY | os.O_CLOEXEC, 0o600)
+    except OSError:
+        # Filesystem without O_TMPFILE support
+        return False
+    try:
+        os.write(fd, payload)
+        os.fsync(fd)
+        # linkat(AT_SYMLINK_FOLLOW) through /proc gives the inode a name
+        os.link(f"/proc/self/fd/{fd}", target)
+        return True
+    except OSError:
+        # FileExistsError (unconsumed command.json) or /proc unavailable
+        return False
+    finally:
+        os.close(fd)
 
 
 def write_command(action: str, params: Dict[str, Any]) -> str:
     """
-    Write command file atomically, return UUID.
+    Write command file atomically, return its id.
 
     Args:
         action: Command action (run-tests, compile, etc.)
         params: Command parameters dictionary
 
     Returns:
-        Command UUID string
+        Command id string (UUID layout)
 
     Raises:
         UnityCommandError: If writing fails
     """
-    command_id = str(uuid.uuid4())
+    command_id = _new_command_id()
     command = {"id": command_id, "action": action, "params": params}
 
-    # Security: Ensure UNITY_DIR is not a symlink (prevent symlink attacks)
-    if UNITY_DIR.exists() and UNITY_DIR.is_symlink():
+    unity_dir = _unity_dir()
+
+    # One lstat answers existence, type and permissions for the directory
+    try:
+        dir_stat = _lstat_or_none(unity_dir)
+    except OSError as e:
+        raise UnityCommandError(f"Failed to create Unity directory: {e}")
+
+    # Security: Ensure the bridge directory is not a symlink (prevent symlink attacks)
+    if dir_stat is not None and stat.S_ISLNK(dir_stat.st_mode):
         raise UnityCommandError("Security error: .unity-bridge cannot be a symlink")
 
-    # Ensure directory exists
-    dir_existed = UNITY_DIR.exists()
+    # Ensure directory exists with owner-only permissions
     try:
-        UNITY_DIR.mkdir(parents=True, exist_ok=True)
-        if sys.platform != "win32":
-            os.chmod(UNITY_DIR, 0o700)
+        if dir_stat is None:
+            unity_dir.mkdir(parents=True, exist_ok=True)
+        elif not stat.S_ISDIR(dir_stat.st_mode):
+            raise FileExistsError(f"{unity_dir} exists and is not a directory")
+        if sys.platform != "win32" and (
+            dir_stat is None or stat.S_IMODE(dir_stat.st_mode) != 0o700
+        ):
+            os.chmod(unity_dir, 0o700)
     except Exception as e:
         raise UnityCommandError(f"Failed to create Unity directory: {e}")
 
     # Notify about gitignore on first directory creation
-    if not dir_existed:
+    if dir_stat is None:
         check_gitignore_and_notify()
 
-    # Atomic write using temp file
-    command_file = UNITY_DIR / "command.json"
+    command_file = unity_dir / COMMAND_FILE_NAME
     temp_file = command_file.with_suffix(".tmp")
 
+    # Unity reads this file, not a person: write compact JSON
+    payload = _dumps(command)
+
+    # Linux: materialize a fully written anonymous file in one step
+    if _link_anonymous_file(command_file, payload):
+        return command_id
+
+    # Atomic write using temp file
     try:
-        temp_file.write_text(json.dumps(command, indent=2))
-        if sys.platform != "win32":
-            os.chmod(temp_file, 0o600)
-        temp_file.replace(command_file)
+        # Remove a temp file left behind by an interrupted run so O_EXCL can succeed
+        try:
+            temp_file.unlink()
+        except FileNotFoundError:
+            pass
+        # Create with owner-only permissions from the start (no chmod window)
+        fd = os.open(temp_file, _COMMAND_OPEN_FLAGS, 0o600)
+        try:
+            os.write(fd, payload)
+            if sys.platform != "win32":
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(temp_file, command_file)
     except Exception as e:
         # Cleanup temp file if it exists
-        if temp_file.exists():
-            try:
-                temp_file.unlink()
-            except Exception:
-                pass
+        try:
+            temp_file.unlink()
+        except Exception:
+            pass
         raise UnityCommandError(f"Failed to write command file: {e}")
 
     return command_id
 
 
-def wait_for_response(command_id: str, timeout: int, verbose: bool = False) -> Dict[str, Any]:
+def _watch_response_file(response_file: Path) -> Optional[Iterator[Any]]:
     """
-    Poll for response file with exponential backoff.
+    Start an OS-level watch on the response file's directory.
+
+    Uses the optional watchfiles package (inotify, FSEvents or
+    ReadDirectoryChangesW under the hood) so the CLI wakes up as soon as
+    Unity writes the response instead of sleeping through a poll interval.
+
+    Args:
+        response_file: Response file to watch for
+
+    Returns:
+        Iterator that yields when the response file changes (or after
+        WATCH_TIMEOUT_MS without a change), or None if watching is not
+        available and the caller should fall back to polling.
+    """
+    try:
+        from watchfiles import watch
+    except ImportError:
+        return None
+
+    if not response_file.parent.is_dir():
+        return None
+
+    target = response_file.name
+    return watch(
+        response_file.parent,
+        watch_filter=lambda _change, path: os.path.basename(path) == target,
+        debounce=WATCH_DEBOUNCE_MS,
+        step=WATCH_STEP_MS,
+        rust_timeout=WATCH_TIMEOUT_MS,
+        yield_on_timeout=True,
+        recursive=False,
+    )
+
+
+def _wait_for_change(
+    watcher: Optional[Iterator[Any]],
+    sleep_time: float,
+    deadline: Optional[float] = None,
+    multiplier: float = SLEEP_MULTIPLIER,
+) -> Tuple[Optional[Iterator[Any]], float]:
+    """
+    Block until the response file changes or the current poll interval elapses.
+
+    With a watcher, the wait ends on a filesystem event or after
+    WATCH_TIMEOUT_MS, so it can run past the deadline by up to that timeout
+    plus the debounce. When polling, the sleep is clamped to the deadline so
+    it never overshoots the command timeout.
+
+    Args:
+        watcher: Iterator from _watch_response_file, or None when polling
+        sleep_time: Current poll interval in seconds
+        deadline: Absolute time.time() value after which waiting is pointless
+        multiplier: Backoff factor applied to the poll interval after each wait
+
+    Returns:
+        Tuple of (watcher, next poll interval). The watcher is returned as
+        None once it has failed, so subsequent waits fall back to polling.
+    """
+    if watcher is not None:
+        try:
+            next(watcher)
+            return watcher, sleep_time
+        except Exception:
+            # Watch failed (e.g. inotify watch limit reached) - fall back to polling
+            watcher = None
+
+    wait = sleep_time
+    if deadline is not None:
+        wait = max(0.0, min(wait, deadline - time.time()))
+    time.sleep(wait)
+    return watcher, min(sleep_time * multiplier, MAX_SLEEP)
+
+
+def _load_round_trip_times() -> List[float]:
+    """Return recent command round-trip times in milliseconds (empty if unavailable)."""
+    try:
+        timings = _loads((_unity_dir() / TIMINGS_FILE).read_bytes())
+    except Exception:
+        return []
+    if not isinstance(timings, list):
+        return []
+    return [t for t in timings if isinstance(t, (int, float)) and t >= 0]
+
+
+def _record_round_trip(elapsed_ms: float) -> None:
+    """Append a round-trip time to the timings file, keeping the most recent entries."""
+    timings = _load_round_trip_times()
+    timings.append(round(elapsed_ms, 1))
+    try:
+        (_unity_dir() / TIMINGS_FILE).write_bytes(_dumps(timings[-TIMINGS_HISTORY:]))
+    except Exception:
+        # Timings only tune polling; never fail a command over them
+        pass
+
+
+def _cache_status(formatted: str) -> None:
+    """Remember a successful get-status result; best effort."""
+    try:
+        (_unity_dir() / STATUS_CACHE_FILE).write_bytes(
+            _dumps({"ts": time.time(), "result": formatted})
+        )
+    except Exception:
+        pass
+
+
+def _load_cached_status() -> Optional[str]:
+    """Return the last get-status result if it is younger than STATUS_CACHE_TTL."""
+    try:
+        cached = _loads((_unity_dir() / STATUS_CACHE_FILE).read_bytes())
+        age = time.time() - cached["ts"]
+        result = cached["result"]
+    except Exception:
+        return None
+    if not isinstance(result, str) or not 0 <= age < STATUS_CACHE_TTL:
+        return None
+    return result
+
+
+def _initial_sleep_time(poll_min: float = MIN_SLEEP) -> float:
+    """
+    Pick the first poll delay from recent round-trip times.
+
+    Starts at half the median round trip, clamped between poll_min and
+    MAX_INITIAL_SLEEP; without any history, starts at poll_min.
+    """
+    timings = _load_round_trip_times()
+    if not timings:
+        return poll_min
+    timings.sort()
+    middle = len(timings) // 2
+    median = timings[middle] if len(timings) % 2 else (timings[middle - 1] + timings[middle]) / 2
+    half_median = median / 2000.0
+    return max(poll_min, min(MAX_INITIAL_SLEEP, half_median))
+
+
+_READ_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_CLOEXEC", 0)
+# Linux only; the kernel refuses it (EPERM) for files owned by another user
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+
+def _read_file(path: Path) -> bytes:
+    """
+    Read a whole file that is read once, front to back.
+
+    Skips the access-time update where allowed and tells the kernel to read
+    ahead, which helps multi-megabyte console log responses.
+    """
+    try:
+        fd = os.open(path, _READ_OPEN_FLAGS | _O_NOATIME)
+    except PermissionError:
+        if not _O_NOATIME:
+            raise
+        fd = os.open(path, _READ_OPEN_FLAGS)
+    with open(fd, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        return f.read()
+
+
+def _read_response(
+    response_file: Path, command_id: str
+) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    """
+    Read and parse a response file in a single attempt.
+
+    Returns:
+        Tuple of (parsed response, raw bytes read), or None if Unity hasn't
+        written it yet
+
+    Raises:
+        json.JSONDecodeError: If the file is incomplete or malformed
+        UnityCommandError: If the response belongs to a different command
+    """
+    try:
+        raw = _read_file(response_file)
+    except FileNotFoundError:
+        return None
+    result = _loads(raw)
+    if result.get("id", "") != command_id:
+        raise UnityCommandError(f"Response ID mismatch: expected {command_id}")
+    return result, raw
+
+
+def _print_progress(result: Dict[str, Any]) -> None:
+    """Print progress from a "running" response."""
+    progress = result.get("progress", {})
+    current = progress.get("current", 0)
+    total = progress.get("total", 0)
+    current_test = progress.get("currentTest", "")
+    if total > 0:
+        print(f"Tests in progress: {current}/{total} {current_test}", file=sys.stderr)
+    else:
+        print("Command running...", file=sys.stderr)
+
+
+def wait_for_response(
+    command_id: str,
+    timeout: int,
+    verbose: bool = False,
+    poll_min: Optional[float] = None,
+    poll_base: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Wait for response file, using filesystem events when available.
+
+    Falls back to polling with exponential backoff when watchfiles is not
+    installed or the watch cannot be established.
 
     Args:
         command_id: UUID of the command
         timeout: Maximum seconds to wait
         verbose: Print polling progress
+        poll_min: Shortest poll interval in seconds (default: MIN_SLEEP)
+        poll_base: Poll interval backoff factor (default: SLEEP_MULTIPLIER)
 
     Returns:
         Parsed response dictionary
@@ -177,83 +540,86 @@ def wait_for_response(command_id: str, timeout: int, verbose: bool = False) -> D
         CommandTimeoutError: If timeout is reached
         UnityCommandError: If response parsing fails
     """
+    return _wait_for_raw_response(command_id, timeout, verbose, poll_min, poll_base)[0]
+
+
+def _wait_for_raw_response(
+    command_id: str,
+    timeout: int,
+    verbose: bool = False,
+    poll_min: Optional[float] = None,
+    poll_base: Optional[float] = None,
+) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Wait for the final response like wait_for_response, also returning its raw bytes.
+
+    Returns:
+        Tuple of (parsed response, bytes read from the response file)
+    """
     _validate_command_id(command_id)
-    response_file = UNITY_DIR / f"response-{command_id}.json"
+    response_file = _unity_dir() / f"response-{command_id}.json"
 
     start = time.time()
-    sleep_time = MIN_SLEEP
+    deadline = start + timeout
+    multiplier = SLEEP_MULTIPLIER if poll_base is None else poll_base
+    sleep_time = _initial_sleep_time(MIN_SLEEP if poll_min is None else poll_min)
     attempts = 0
+    watcher = _watch_response_file(response_file)
 
-    while time.time() - start < timeout:
-        attempts += 1
+    parse_failures = 0
+    failed_size = -1
 
-        if response_file.exists():
-            # Wait a bit for Unity to finish writing
-            time.sleep(0.1)
+    try:
+        while time.time() - start < timeout:
+            attempts += 1
 
             try:
-                response_text = response_file.read_text()
-                result = json.loads(response_text)
-                response_id = result.get("id", "")
-                if response_id != command_id:
-                    raise UnityCommandError(f"Response ID mismatch: expected {command_id}")
-                # Continue polling if command is still running (Unity writes progress updates)
-                if result.get("status") == "running":
-                    if verbose:
-                        progress = result.get("progress", {})
-                        current = progress.get("current", 0)
-                        total = progress.get("total", 0)
-                        current_test = progress.get("currentTest", "")
-                        if total > 0:
-                            print(
-                                f"Tests in progress: {current}/{total} {current_test}",
-                                file=sys.stderr,
-                            )
-                        else:
-                            print("Command running...", file=sys.stderr)
-                    time.sleep(sleep_time)
-                    sleep_time = min(sleep_time * SLEEP_MULTIPLIER, MAX_SLEEP)
-                    continue
-                return result
-            except json.JSONDecodeError:
-                # Might have caught it mid-write, retry once
+                read = _read_response(response_file, command_id)
+            except json.JSONDecodeError as e:
+                # Only an unchanged document counts toward the retry limit, so a
+                # slow writer still growing the file is waited out
+                if len(e.doc) != failed_size:
+                    failed_size = len(e.doc)
+                    parse_failures = 0
+                parse_failures += 1
+                if parse_failures > PARSE_RETRIES:
+                    # Log raw response for debugging
+                    print("Error: Invalid JSON in response file", file=sys.stderr)
+                    print(f"Raw response: {e.doc}", file=sys.stderr)
+                    raise UnityCommandError(f"Failed to parse response JSON: {e}")
+                # Might have caught it mid-write, retry shortly
                 if verbose:
                     print(
                         "Warning: Failed to parse response, retrying...",
                         file=sys.stderr,
                     )
-                time.sleep(0.2)
-                try:
-                    response_text = response_file.read_text()
-                    result = json.loads(response_text)
-                    response_id = result.get("id", "")
-                    if response_id != command_id:
-                        raise UnityCommandError(f"Response ID mismatch: expected {command_id}")
-                    # Continue polling if command is still running
-                    if result.get("status") == "running":
-                        time.sleep(sleep_time)
-                        sleep_time = min(sleep_time * SLEEP_MULTIPLIER, MAX_SLEEP)
-                        continue
-                    return result
-                except json.JSONDecodeError as e:
-                    # Log raw response for debugging
-                    print("Error: Invalid JSON in response file", file=sys.stderr)
-                    print(f"Raw response: {response_text}", file=sys.stderr)
-                    raise UnityCommandError(f"Failed to parse response JSON: {e}")
+                time.sleep(PARSE_RETRY_DELAY)
+                continue
             except UnityCommandError:
                 raise
             except Exception as e:
                 raise UnityCommandError(f"Failed to read response file: {e}")
 
-        if verbose and attempts % 10 == 0:
-            elapsed = time.time() - start
-            print(f"Waiting for response... ({elapsed:.1f}s)", file=sys.stderr)
+            parse_failures = 0
+            failed_size = -1
+            if read is not None:
+                result = read[0]
+                # Continue polling if command is still running (Unity writes progress updates)
+                if result.get("status") != "running":
+                    return read
+                if verbose:
+                    _print_progress(result)
+            elif verbose and attempts % 10 == 0:
+                elapsed = time.time() - start
+                print(f"Waiting for response... ({elapsed:.1f}s)", file=sys.stderr)
 
-        time.sleep(sleep_time)
-        sleep_time = min(sleep_time * SLEEP_MULTIPLIER, MAX_SLEEP)
+            watcher, sleep_time = _wait_for_change(watcher, sleep_time, deadline, multiplier)
+    finally:
+        if watcher is not None:
+            watcher.close()
 
     # Check if Unity directory exists - if not, Unity likely isn't running
-    if not UNITY_DIR.exists():
+    if not _unity_dir().exists():
         raise UnityNotRunningError(
             "Unity Editor not detected. Ensure Unity is open with the project loaded."
         )
@@ -283,28 +649,48 @@ def format_response(response: Dict[str, Any], action: str) -> str:
         error_msg = response.get("error", "Unknown error")
         return f"✗ Error: {error_msg}"
 
-    # Format based on action type
-    if action == "run-tests":
-        return format_test_results(response, status, duration_sec)
-    elif action == "compile":
-        return format_compile_results(response, status, duration_sec)
-    elif action == "get-console-logs":
-        return format_console_logs(response)
-    elif action == "get-status":
-        return format_editor_status(response)
-    elif action == "refresh":
-        return format_refresh_results(response, status, duration_sec)
-    elif action in ("play", "pause", "step"):
-        return format_play_mode_result(response, status, duration_sec)
-    elif action == "build":
-        return format_build_results(response, status, duration_sec)
-    else:
-        # Generic formatting
-        return format_generic_response(response, status, duration_sec)
+    # Format based on action type, falling back to generic formatting
+    formatter = _FORMATTERS.get(action, format_generic_response)
+    return formatter(response, status, duration_sec)
+
+
+def write_response(response: Dict[str, Any], action: str, file: TextIO) -> None:
+    """
+    Write a formatted response to a stream, followed by a newline.
+
+    Console log listings and test results are written line by line, so a large
+    response is never held in memory a second time as one formatted string.
+
+    Args:
+        response: Parsed response dictionary
+        action: Command action name
+        file: Stream to write to
+    """
+    lines: Optional[Iterator[str]] = None
+    if response.get("status") != "error":
+        logs = response.get("consoleLogs")
+        if action == "get-console-logs" and logs:
+            lines = _iter_console_log_lines(response, logs)
+        elif action == "run-tests":
+            lines = _iter_test_result_lines(response, response.get("duration_ms", 0) / 1000.0)
+
+    if lines is None:
+        file.write(format_response(response, action))
+        file.write("\n")
+        return
+
+    for line in lines:
+        file.write(line)
+        file.write("\n")
 
 
 def format_test_results(response: Dict[str, Any], status: str, duration: float) -> str:
     """Format run-tests response"""
+    return "\n".join(_iter_test_result_lines(response, duration))
+
+
+def _iter_test_result_lines(response: Dict[str, Any], duration: float) -> Iterator[str]:
+    """Yield the lines of a run-tests summary and its failures."""
     result = response.get("result", {})
     passed = result.get("passed", 0)
     failed = result.get("failed", 0)
@@ -312,26 +698,22 @@ def format_test_results(response: Dict[str, Any], status: str, duration: float)
     failures = result.get("failures", [])
 
     # Summary
-    lines = [
-        f"✓ Tests Passed: {passed}",
-        f"✗ Tests Failed: {failed}",
-        f"○ Tests Skipped: {skipped}",
-        f"Duration: {duration:.2f}s",
-    ]
+    yield f"✓ Tests Passed: {passed}"
+    yield f"✗ Tests Failed: {failed}"
+    yield f"○ Tests Skipped: {skipped}"
+    yield f"Duration: {duration:.2f}s"
 
     # Failed tests details
     if failed > 0 and failures:
-        lines.append("")
-        lines.append("Failed Tests:")
+        yield ""
+        yield "Failed Tests:"
         for failure in failures:
             name = failure.get("name", "Unknown test")
             message = failure.get("message", "")
-            lines.append(f"  - {name}")
+            yield f"  - {name}"
             if message:
                 # Try to extract file path from message
-                lines.append(f"    {message}")
-
-    return "\n".join(lines)
+                yield f"    {message}"
 
 
 def format_compile_results(response: Dict[str, Any], status: str, duration: float) -> str:
@@ -355,12 +737,17 @@ def format_console_logs(response: Dict[str, Any]) -> str:
     if not logs:
         return "No console logs found"
 
+    return "\n".join(_iter_console_log_lines(response, logs))
+
+
+def _iter_console_log_lines(response: Dict[str, Any], logs: List[Dict[str, Any]]) -> Iterator[str]:
+    """Yield the lines of a console log listing without building them up in a list."""
     log_filter = response.get("params", {}).get("filter", "")
     limit = len(logs)
 
     filter_suffix = f", filtered by {log_filter}" if log_filter else ""
-    lines = [f"Console Logs (last {limit}{filter_suffix}):"]
-    lines.append("")
+    yield f"Console Logs (last {limit}{filter_suffix}):"
+    yield ""
 
     for log in logs:
         log_type = log.get("type", "Log")
@@ -380,17 +767,15 @@ def format_console_logs(response: Dict[str, Any]) -> str:
         if count > 1:
             indicator += f" (x{count})"
 
-        lines.append(f"{indicator} {message}")
+        yield f"{indicator} {message}"
 
         if stack_trace:
             # Indent stack trace
-            for line in stack_trace.split("\n"):
+            for line in stack_trace.splitlines():
                 if line.strip():
-                    lines.append(f"  {line}")
+                    yield f"  {line}"
 
-        lines.append("")
-
-    return "\n".join(lines)
+        yield ""
 
 
 def format_editor_status(response: Dict[str, Any]) -> str:
@@ -526,6 +911,20 @@ def format_generic_response(response: Dict[str, Any], status: str, duration: flo
         return f"{action} status: {status}\nDuration: {duration:.2f}s"
 
 
+# Action -> formatter, all called as formatter(response, status, duration)
+_FORMATTERS: Dict[str, Callable[[Dict[str, Any], str, float], str]] = {
+    "run-tests": format_test_results,
+    "compile": format_compile_results,
+    "get-console-logs": lambda response, status, duration: format_console_logs(response),
+    "get-status": lambda response, status, duration: format_editor_status(response),
+    "refresh": format_refresh_results,
+    "play": format_play_mode_result,
+    "pause": format_play_mode_result,
+    "step": format_play_mode_result,
+    "build": format_build_results,
+}
+
+
 def cleanup_old_responses(max_age_hours: int = 1, verbose: bool = False):
     """
     Remove stale response and temp files.
@@ -534,26 +933,38 @@ def cleanup_old_responses(max_age_hours: int = 1, verbose: bool = False):
         max_age_hours: Maximum age in hours before cleanup
         verbose: Print cleanup progress
     """
-    if not UNITY_DIR.exists():
-        return
-
     current_time = time.time()
     max_age_seconds = max_age_hours * 3600
     cleaned = 0
 
-    for pattern in ("response-*.json", "*.tmp"):
-        for stale_file in UNITY_DIR.glob(pattern):
+    # One directory read for both patterns; DirEntry caches its stat result
+    try:
+        entries = os.scandir(_unity_dir())
+    except OSError:
+        # Missing, not a directory, or unreadable - nothing we can clean
+        return
+
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if not (
+                (name.startswith("response-") and name.endswith(".json")) or name.endswith(".tmp")
+            ):
+                continue
             try:
-                file_age = current_time - stale_file.stat().st_mtime
+                file_age = current_time - entry.stat().st_mtime
                 if file_age > max_age_seconds:
-                    stale_file.unlink()
+                    os.unlink(entry.path)
                     cleaned += 1
                     if verbose:
-                        print(f"Cleaned up: {stale_file.name}", file=sys.stderr)
+                        print(f"Cleaned up: {name}", file=sys.stderr)
+            except FileNotFoundError:
+                # Removed concurrently (by Unity or another CLI run) - already clean
+                pass
             except Exception as e:
                 if verbose:
                     print(
-                        f"Warning: Failed to cleanup {stale_file.name}: {e}",
+                        f"Warning: Failed to cleanup {name}: {e}",
                         file=sys.stderr,
                     )
 
@@ -572,17 +983,18 @@ def cleanup_stale_command_file(timeout: int, verbose: bool = False):
         timeout: Command timeout in seconds (used as staleness threshold)
         verbose: Print cleanup progress
     """
-    command_file = UNITY_DIR / "command.json"
+    command_file = _unity_dir() / COMMAND_FILE_NAME
     try:
-        if command_file.exists():
-            file_age = time.time() - command_file.stat().st_mtime
-            if file_age > timeout:
-                command_file.unlink()
-                if verbose:
-                    print(
-                        f"Cleaned up stale command file ({file_age:.0f}s old)",
-                        file=sys.stderr,
-                    )
+        file_age = time.time() - command_file.stat().st_mtime
+        if file_age > timeout:
+            command_file.unlink()
+            if verbose:
+                print(
+                    f"Cleaned up stale command file ({file_age:.0f}s old)",
+                    file=sys.stderr,
+                )
+    except FileNotFoundError:
+        pass
     except Exception as e:
         if verbose:
             print(
@@ -600,24 +1012,40 @@ def cleanup_response_file(command_id: str, verbose: bool = False):
         verbose: Print cleanup progress
     """
     _validate_command_id(command_id)
-    response_file = UNITY_DIR / f"response-{command_id}.json"
+    response_file = _unity_dir() / f"response-{command_id}.json"
 
     try:
-        if response_file.exists():
-            response_file.unlink()
-            if verbose:
-                print(f"Cleaned up response file: {response_file.name}", file=sys.stderr)
+        response_file.unlink()
+        if verbose:
+            print(f"Cleaned up response file: {response_file.name}", file=sys.stderr)
+    except FileNotFoundError:
+        pass
     except Exception as e:
         if verbose:
             print(f"Warning: Failed to cleanup response file: {e}", file=sys.stderr)
 
 
+def _write_raw(data: bytes, output: TextIO) -> None:
+    """Write bytes to a text stream, through its binary buffer when it has one."""
+    buffer = getattr(output, "buffer", None)
+    if buffer is None:
+        output.write(data.decode("utf-8"))
+        return
+    output.flush()
+    buffer.write(data)
+    buffer.flush()
+
+
 def execute_command(
     action: str,
     params: Dict[str, Any],
     timeout: int,
     cleanup: bool = False,
     verbose: bool = False,
+    poll_min: Optional[float] = None,
+    poll_base: Optional[float] = None,
+    output: Optional[TextIO] = None,
+    json_output: bool = False,
 ) -> str:
     """
     Execute Unity command and return formatted response.
@@ -628,9 +1056,13 @@ def execute_command(
         timeout: Timeout in seconds
         cleanup: Unused, kept for backwards compatibility
         verbose: Print progress messages
+        poll_min: Shortest response poll interval in seconds
+        poll_base: Response poll backoff factor
+        output: If given, write the formatted response here instead of returning it
+        json_output: Return Unity's response JSON verbatim instead of formatting it
 
     Returns:
-        Formatted response string
+        Formatted response string, or an empty string if it was written to output
 
     Raises:
         UnityCommandError: On execution errors
@@ -650,13 +1082,37 @@ def execute_command(
         print(f"Waiting for response (timeout: {timeout}s)...", file=sys.stderr)
 
     try:
-        response = wait_for_response(command_id, timeout, verbose)
+        start = time.time()
+        response, raw = _wait_for_raw_response(
+            command_id, timeout, verbose, poll_min=poll_min, poll_base=poll_base
+        )
+        _record_round_trip((time.time() - start) * 1000)
+        formatted = None
+        if action == "get-status" and response.get("status") != "error":
+            formatted = format_response(response, action)
+            _cache_status(formatted)
+        if json_output:
+            # Pass through the bytes already read rather than touching the file again
+            raw = raw.rstrip()
+            if output is None:
+                return raw.decode("utf-8")
+            _write_raw(raw + b"\n", output)
+            return ""
+        if formatted is not None:
+            if output is not None:
+                output.write(formatted + "\n")
+                return ""
+            return formatted
+        if output is not None:
+            write_response(response, action, output)
+            return ""
         formatted = format_response(response, action)
         return formatted
     finally:
         cleanup_response_file(command_id, verbose)
 
 
+@lru_cache(maxsize=None)
 def get_skill_source_dir() -> Optional[Path]:
     """
     Find the skill directory bundled with this package.
@@ -686,23 +1142,136 @@ def get_skill_source_dir() -> Optional[Path]:
     return None
 
 
+@lru_cache(maxsize=None)
 def get_claude_skills_dir() -> Path:
     """Get the Claude Code skills directory path."""
     return Path.home() / ".claude" / "skills"
 
 
+@lru_cache(maxsize=None)
 def get_skill_target_dir() -> Path:
     """Get the target directory for the unity-bridge skill."""
     return get_claude_skills_dir() / "unity-bridge"
 
 
-def install_skill(verbose: bool = False) -> int:
+def get_skill_manifest_file() -> Path:
+    """
+    Get the manifest recording what the installed skill was built from.
+
+    Kept beside the skill rather than inside it, since a symlinked install
+    points into the package directory.
+    """
+    return get_claude_skills_dir() / ".unity-bridge.installed"
+
+
+def _get_package_version() -> Optional[str]:
+    """Return the installed claude-unity-bridge version, or None if unknown."""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        return None
+    try:
+        return version("claude-unity-bridge")
+    except PackageNotFoundError:
+        return None
+
+
+def _newest_mtime(source_dir: Path) -> float:
+    """Return the newest modification time of the directory or anything inside it."""
+    newest = source_dir.stat().st_mtime
+    for root, dirs, files in os.walk(source_dir):
+        for name in dirs + files:
+            newest = max(newest, os.stat(os.path.join(root, name)).st_mtime)
+    return newest
+
+
+def _skill_install_state(source_dir: Path) -> Dict[str, Any]:
+    """Describe the skill source an installation was made from."""
+    return {
+        "source_path": str(source_dir),
+        "source_mtime": _newest_mtime(source_dir),
+        "package_version": _get_package_version(),
+    }
+
+
+def _write_skill_manifest(source_dir: Path) -> None:
+    """Record the installed skill's source; best effort."""
+    try:
+        get_skill_manifest_file().write_bytes(_dumps(_skill_install_state(source_dir)))
+    except Exception:
+        pass
+
+
+def _remove_skill_manifest() -> None:
+    """Forget the installed skill's source; best effort."""
+    try:
+        get_skill_manifest_file().unlink()
+    except Exception:
+        pass
+
+
+def is_skill_up_to_date() -> bool:
+    """
+    Check whether the installed skill was made from the current package.
+
+    Returns:
+        True if the skill is installed and its manifest matches the current
+        source path, package version and newest file modification time in
+        the source tree (so in-place edits are picked up).
+    """
+    source_dir = get_skill_source_dir()
+    if source_dir is None or _lstat_or_none(get_skill_target_dir()) is None:
+        return False
+    try:
+        manifest = _loads(get_skill_manifest_file().read_bytes())
+        current = _skill_install_state(source_dir)
+    except Exception:
+        return False
+    return current["package_version"] is not None and manifest == current
+
+
+def _lstat_or_none(path: Path) -> Optional[os.stat_result]:
+    """Stat a path without following symlinks, returning None if nothing is there."""
+    try:
+        return os.lstat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _copy_skill_tree(source_dir: Path, target_dir: Path) -> None:
+    """
+    Copy the skill directory, hardlinking files where the filesystem allows it.
+
+    Hardlinks avoid duplicating file contents; if linking fails (e.g. the
+    target is on a different device), the partial tree is removed and the
+    files are copied normally.
+    """
+    import shutil
+
+    try:
+        shutil.copytree(source_dir, target_dir, copy_function=os.link)
+    except (OSError, shutil.Error):
+        shutil.rmtree(target_dir, ignore_errors=True)
+        shutil.copytree(source_dir, target_dir)
+
+
+def install_skill(verbose: bool = False, force: bool = False) -> int:
     """
     Install the Claude Code skill by creating a symlink (with copy fallback on Windows).
 
+    Does nothing if the installed skill already matches the current package,
+    unless force is set.
+
     Returns:
         Exit code (0 for success, 1 for error).
     """
+    if not force and is_skill_up_to_date():
+        print(f"✓ Skill up-to-date: {get_skill_target_dir()}")
+        return EXIT_SUCCESS
+
+    import platform
+    import shutil
+
     source_dir = get_skill_source_dir()
     if source_dir is None:
         print("Error: Could not find skill files in package.", file=sys.stderr)
@@ -733,8 +1302,9 @@ def install_skill(verbose: bool = False) -> int:
     target_dir = get_skill_target_dir()
 
     # Remove existing installation
-    if target_dir.exists() or target_dir.is_symlink():
-        if target_dir.is_symlink():
+    target_stat = _lstat_or_none(target_dir)
+    if target_stat is not None:
+        if stat.S_ISLNK(target_stat.st_mode):
             if verbose:
                 print(f"Removing existing symlink: {target_dir}", file=sys.stderr)
             try:
@@ -742,7 +1312,7 @@ def install_skill(verbose: bool = False) -> int:
             except Exception as e:
                 print(f"Error: Could not remove existing symlink: {e}", file=sys.stderr)
                 return EXIT_ERROR
-        elif target_dir.is_dir():
+        elif stat.S_ISDIR(target_stat.st_mode):
             if verbose:
                 print(f"Removing existing directory: {target_dir}", file=sys.stderr)
             try:
@@ -774,7 +1344,7 @@ def install_skill(verbose: bool = False) -> int:
             print("Falling back to directory copy...", file=sys.stderr)
 
         try:
-            shutil.copytree(source_dir, target_dir)
+            _copy_skill_tree(source_dir, target_dir)
             used_copy_fallback = True
             if verbose:
                 print(f"Copied skill files to: {target_dir}", file=sys.stderr)
@@ -793,6 +1363,8 @@ def install_skill(verbose: bool = False) -> int:
                 )
             return EXIT_ERROR
 
+    _write_skill_manifest(source_dir)
+
     # Success message
     if used_copy_fallback:
         print(f"✓ Skill installed (copy): {target_dir}")
@@ -823,25 +1395,32 @@ def uninstall_skill(verbose: bool = False) -> int:
     Returns:
         Exit code (0 for success, 1 for error).
     """
+    import platform
+    import shutil
+
     target_dir = get_skill_target_dir()
 
-    if not target_dir.exists() and not target_dir.is_symlink():
+    target_stat = _lstat_or_none(target_dir)
+    if target_stat is None:
+        _remove_skill_manifest()
         print("Skill is not installed.")
         return EXIT_SUCCESS
 
-    if target_dir.is_symlink():
+    if stat.S_ISLNK(target_stat.st_mode):
         try:
             target_dir.unlink()
+            _remove_skill_manifest()
             print(f"✓ Skill uninstalled: removed symlink {target_dir}")
             return EXIT_SUCCESS
         except Exception as e:
             print(f"Error: Could not remove symlink: {e}", file=sys.stderr)
             return EXIT_ERROR
-    elif target_dir.is_dir():
+    elif stat.S_ISDIR(target_stat.st_mode):
         # Check if this is a copied skill directory (contains SKILL.md)
         if (target_dir / "SKILL.md").exists():
             try:
                 shutil.rmtree(target_dir)
+                _remove_skill_manifest()
                 print(f"✓ Skill uninstalled: removed directory {target_dir}")
                 return EXIT_SUCCESS
             except Exception as e:
@@ -873,18 +1452,27 @@ def uninstall_skill(verbose: bool = False) -> int:
         return EXIT_ERROR
 
 
-def update_package(verbose: bool = False) -> int:
+def update_package(verbose: bool = False, force: bool = False) -> int:
     """
     Update the package via pip and reinstall the skill.
 
+    The reinstall is skipped when the skill is already installed from the
+    current package (see is_skill_up_to_date), unless force is set.
+
+    Args:
+        verbose: Print pip output and progress messages
+        force: Reinstall the skill even if it is up to date
+
     Returns:
         Exit code (0 for success, 1 for error).
     """
+    import subprocess
+
     print("Updating claude-unity-bridge...")
 
     try:
-        # Run pip install --upgrade
-        result = subprocess.run(
+        # Run pip install --upgrade, streaming its output instead of buffering it all
+        process = subprocess.Popen(
             [
                 sys.executable,
                 "-m",
@@ -893,14 +1481,25 @@ def update_package(verbose: bool = False) -> int:
                 "--upgrade",
                 "claude-unity-bridge",
             ],
-            capture_output=not verbose,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
+            bufsize=1,
         )
+        # Keep only the tail of quiet runs for error diagnostics
+        output_tail: Deque[str] = deque(maxlen=PIP_OUTPUT_TAIL_LINES)
+        with process:
+            for line in process.stdout:
+                if verbose:
+                    sys.stderr.write(line)
+                else:
+                    output_tail.append(line)
+            returncode = process.wait()
 
-        if result.returncode != 0:
+        if returncode != 0:
             print("Error: pip upgrade failed.", file=sys.stderr)
-            if not verbose and result.stderr:
-                print(result.stderr, file=sys.stderr)
+            if output_tail:
+                print("".join(output_tail), end="", file=sys.stderr)
             return EXIT_ERROR
 
         if verbose:
@@ -910,24 +1509,41 @@ def update_package(verbose: bool = False) -> int:
         print(f"Error: Could not run pip: {e}", file=sys.stderr)
         return EXIT_ERROR
 
+    if not force and is_skill_up_to_date():
+        print("✓ Skill up-to-date")
+        return EXIT_SUCCESS
+
     # Reinstall skill to ensure symlink points to updated package
     print("Reinstalling skill...")
-    return install_skill(verbose)
+    return install_skill(verbose, force=True)
 
 
-def execute_health_check(timeout: int, verbose: bool) -> int:
-    """Verify Unity Bridge is set up correctly."""
+def execute_health_check(timeout: int, verbose: bool, use_cache: bool = True) -> int:
+    """
+    Verify Unity Bridge is set up correctly.
+
+    A get-status result from the last STATUS_CACHE_TTL seconds counts as Unity
+    responding, unless use_cache is False.
+    """
     print("Checking Unity Bridge setup...")
 
     # Check 1: Does .unity-bridge directory exist?
-    if not UNITY_DIR.exists():
+    unity_dir = _unity_dir()
+    if not unity_dir.exists():
         print("✗ Unity Bridge not detected")
-        print(f"  Directory not found: {UNITY_DIR}")
+        print(f"  Directory not found: {unity_dir}")
         print("  Is Unity Editor open with the bridge package installed?")
         return EXIT_ERROR
-    print(f"✓ Bridge directory exists: {UNITY_DIR}")
+    print(f"✓ Bridge directory exists: {unity_dir}")
 
     # Check 2: Can we communicate with Unity?
+    cached = _load_cached_status() if use_cache else None
+    if cached is not None:
+        print("✓ Unity Editor is responding (cached)")
+        if verbose:
+            print(cached)
+        return EXIT_SUCCESS
+
     try:
         result = execute_command("get-status", {}, timeout=min(timeout, 5), verbose=verbose)
         print("✓ Unity Editor is responding")
@@ -943,7 +1559,39 @@ def execute_health_check(timeout: int, verbose: bool) -> int:
         return EXIT_TIMEOUT
 
 
-def main():
+def _build_test_params(args: "argparse.Namespace") -> Dict[str, Any]:
+    """Build run-tests parameters from parsed arguments."""
+    params = {}
+    if args.mode:
+        params["testMode"] = args.mode
+    if args.filter:
+        params["filter"] = args.filter
+    return params
+
+
+def _build_log_params(args: "argparse.Namespace") -> Dict[str, Any]:
+    """Build get-console-logs parameters from parsed arguments."""
+    params = {}
+    if args.limit is not None:
+        # Send as string for compatibility with C# JsonUtility which expects string
+        params["limit"] = str(args.limit)
+    if args.filter:
+        params["filter"] = args.filter
+    return params
+
+
+# Command -> parameter builder; build is handled in main since it can fail and adjusts the timeout
+_PARAM_BUILDERS: Dict[str, Callable[["argparse.Namespace"], Dict[str, Any]]] = {
+    "run-tests": _build_test_params,
+    "get-console-logs": _build_log_params,
+}
+
+
+@lru_cache(maxsize=1)
+def _build_parser() -> "argparse.ArgumentParser":
+    """Build the CLI argument parser (once per process)."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Execute Unity Editor commands via Claude Unity Bridge",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1059,24 +1707,118 @@ Examples:
         action="store_true",
         help="Cleanup old response files before executing",
     )
+    # Polling tuning for the fallback when filesystem events are unavailable
+    parser.add_argument("--poll-min", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--poll-base", type=float, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reinstall the skill even if it is up to date (for install-skill and update)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print Unity's raw JSON response instead of formatted output",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always query Unity, ignoring a recent get-status result (for health-check)",
+    )
     parser.add_argument("--verbose", action="store_true", help="Print verbose progress messages")
 
-    args = parser.parse_args()
+    return parser
+
+
+# Unity commands that, given no options, run with empty params and the default timeout
+_SIMPLE_COMMANDS = frozenset(
+    ["run-tests", "compile", "refresh", "get-status", "get-console-logs", "play", "pause", "step"]
+)
+
+
+def _run_unity_command(
+    action: str,
+    params: Dict[str, Any],
+    timeout: int,
+    verbose: bool = False,
+    cleanup: bool = False,
+    poll_min: Optional[float] = None,
+    poll_base: Optional[float] = None,
+    json_output: bool = False,
+) -> int:
+    """Execute a Unity command, print its result and map errors to an exit code."""
+    try:
+        result = execute_command(
+            action=action,
+            params=params,
+            timeout=timeout,
+            cleanup=cleanup,
+            verbose=verbose,
+            poll_min=poll_min,
+            poll_base=poll_base,
+            output=sys.stdout,
+            json_output=json_output,
+        )
+        if result:
+            print(result)
+        return EXIT_SUCCESS
+
+    except CommandTimeoutError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_TIMEOUT
+
+    except UnityNotRunningError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    except UnityCommandError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+        return EXIT_ERROR
+
+    except Exception as e:
+        print(f"Unexpected error: {e}", file=sys.stderr)
+        if verbose:
+            import traceback
+
+            traceback.print_exc()
+        return EXIT_ERROR
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the CLI with argv (the arguments after the program name; default sys.argv[1:])."""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # A bare Unity command needs no option parsing, so skip importing argparse
+    if len(argv) == 1 and argv[0] in _SIMPLE_COMMANDS:
+        return _run_unity_command(argv[0], {}, DEFAULT_TIMEOUT)
+
+    parser = _build_parser()
+    args = parser.parse_args(argv)
 
     # Handle skill management commands first (they don't need timeout validation)
     if args.command == "install-skill":
-        return install_skill(args.verbose)
+        return install_skill(args.verbose, force=args.force)
 
     if args.command == "uninstall-skill":
         return uninstall_skill(args.verbose)
 
     if args.command == "update":
-        return update_package(args.verbose)
+        return update_package(args.verbose, force=args.force)
 
     # Validate timeout (only for Unity commands)
     if args.timeout <= 0:
         parser.error("--timeout must be a positive integer")
 
+    if args.poll_min is not None and args.poll_min <= 0:
+        parser.error("--poll-min must be positive")
+    if args.poll_base is not None and args.poll_base < 1:
+        parser.error("--poll-base must be at least 1")
+
     # Validate limit if provided
     if args.limit is not None:
         if args.limit < MIN_LIMIT or args.limit > MAX_LIMIT:
@@ -1084,32 +1826,20 @@ Examples:
 
     # Handle health-check command separately
     if args.command == "health-check":
-        return execute_health_check(args.timeout, args.verbose)
+        return execute_health_check(args.timeout, args.verbose, use_cache=not args.no_cache)
 
     # Build parameters based on command
-    params = {}
-
-    if args.command == "run-tests":
-        if args.mode:
-            params["testMode"] = args.mode
-        if args.filter:
-            params["filter"] = args.filter
-
-    elif args.command == "get-console-logs":
-        if args.limit is not None:
-            # Send as string for compatibility with C# JsonUtility which expects string
-            params["limit"] = str(args.limit)
-        if args.filter:
-            params["filter"] = args.filter
+    build_params = _PARAM_BUILDERS.get(args.command)
+    params = build_params(args) if build_params else {}
 
-    elif args.command == "build":
+    if args.command == "build":
         # Override default timeout for builds
         if args.timeout == DEFAULT_TIMEOUT:
             args.timeout = BUILD_DEFAULT_TIMEOUT
 
         # Resolve profile if specified
         if args.profile:
-            build_config = load_build_config(UNITY_DIR)
+            build_config = load_build_config(_unity_dir())
             if build_config is None:
                 print(
                     f"Error: Build profile '{args.profile}' requested but "
@@ -1154,41 +1884,16 @@ Examples:
         if args.env and "env" not in params:
             params["env"] = ";".join(args.env)
 
-    # Execute command
-    try:
-        result = execute_command(
-            action=args.command,
-            params=params,
-            timeout=args.timeout,
-            cleanup=args.cleanup,
-            verbose=args.verbose,
-        )
-        print(result)
-        return EXIT_SUCCESS
-
-    except CommandTimeoutError as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return EXIT_TIMEOUT
-
-    except UnityNotRunningError as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return EXIT_ERROR
-
-    except UnityCommandError as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return EXIT_ERROR
-
-    except KeyboardInterrupt:
-        print("\nInterrupted by user", file=sys.stderr)
-        return EXIT_ERROR
-
-    except Exception as e:
-        print(f"Unexpected error: {e}", file=sys.stderr)
-        if args.verbose:
-            import traceback
-
-            traceback.print_exc()
-        return EXIT_ERROR
+    return _run_unity_command(
+        args.command,
+        params,
+        args.timeout,
+        verbose=args.verbose,
+        cleanup=args.cleanup,
+        poll_min=args.poll_min,
+        poll_base=args.poll_base,
+        json_output=args.json,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import pytest
+
+from claude_unity_bridge import cli
+
+
+@pytest.fixture(scope="session")
+def _shared_unity_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("unity-bridge")
+
+
+@pytest.fixture
+def unity_dir(_shared_unity_dir, monkeypatch):
+    """Point the CLI's .unity-bridge directory at an emptied, session-wide directory.
+
+    Tests that need a directory of their own (or none at all) use tmp_path instead.
+    """
+    with os.scandir(_shared_unity_dir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    monkeypatch.setattr(cli, "UNITY_DIR", _shared_unity_dir)
+    return _shared_unity_dir
+
+
+class VirtualClock:
+    """Stands in for the CLI's time module; sleeping advances the clock instantly."""
+
+    def __init__(self, start=1_000_000.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def time_ns(self):
+        return int(self.now * 1e9)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def virtual_clock(monkeypatch):
+    """Run CLI polling loops in virtual time, without filesystem watching."""
+    clock = VirtualClock()
+    monkeypatch.setattr(cli, "time", clock)
+    monkeypatch.setattr(cli, "_watch_response_file", lambda response_file: None)
+    return clock
@@ -4,24 +4,27 @@ Tests for Unity Bridge CLI.
 Run with: pytest skill/tests/test_cli.py
 """
 
+import io
 import json
+import os
+import stat
+import subprocess
 import sys
+import tempfile
+import threading
 import time
+import uuid
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager, redirect_stderr
+from itertools import chain, repeat
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import DEFAULT, Mock, patch
 
 import pytest
 
+from claude_unity_bridge import cli
 from claude_unity_bridge.cli import (
     format_response,
-    format_test_results,
-    format_compile_results,
-    format_console_logs,
-    format_editor_status,
-    format_refresh_results,
-    format_play_mode_result,
-    format_build_results,
-    format_generic_response,
     write_command,
     wait_for_response,
     cleanup_old_responses,
@@ -33,408 +36,164 @@ from claude_unity_bridge.cli import (
     install_skill,
     uninstall_skill,
     update_package,
+    is_skill_up_to_date,
     get_skill_source_dir,
     get_skill_target_dir,
     get_claude_skills_dir,
     load_build_config,
+    _build_parser,
     _validate_command_id,
+    _new_command_id,
+    _wait_for_change,
+    _initial_sleep_time,
+    _record_round_trip,
+    _copy_skill_tree,
+    _dumps,
+    _link_anonymous_file,
+    _read_file,
+    _watch_response_file,
     main,
     UnityCommandError,
     CommandTimeoutError,
     UnityNotRunningError,
     BUILD_DEFAULT_TIMEOUT,
+    DEFAULT_TIMEOUT,
     EXIT_SUCCESS,
     EXIT_ERROR,
     EXIT_TIMEOUT,
     MIN_LIMIT,
     MAX_LIMIT,
+    MAX_SLEEP,
+    MAX_INITIAL_SLEEP,
+    TIMINGS_HISTORY,
+    MIN_SLEEP,
+    PIP_OUTPUT_TAIL_LINES,
+    PARSE_RETRIES,
+    SLEEP_MULTIPLIER,
 )
 
 
-class TestFormatTestResults:
-    """Test formatting of test results"""
+def _write_json(path, obj):
+    """Write obj as compact UTF-8 JSON, with the same encoder the CLI uses."""
+    path.write_bytes(_dumps(obj))
 
-    def test_all_tests_passed(self):
-        response = {
-            "status": "success",
-            "result": {"passed": 410, "failed": 0, "skipped": 0, "failures": []},
-        }
-        result = format_test_results(response, "success", 1.25)
-
-        assert "✓ Tests Passed: 410" in result
-        assert "✗ Tests Failed: 0" in result
-        assert "○ Tests Skipped: 0" in result
-        assert "Duration: 1.25s" in result
-        assert "Failed Tests:" not in result
-
-    def test_tests_with_failures(self):
-        response = {
-            "status": "failure",
-            "result": {
-                "passed": 408,
-                "failed": 2,
-                "skipped": 1,
-                "failures": [
-                    {
-                        "name": "MXR.Tests.AuthTests.LoginTest",
-                        "message": "Expected: success\nActual: failure",
-                    },
-                    {
-                        "name": "MXR.Tests.NetworkTests.TimeoutTest",
-                        "message": "NullReferenceException",
-                    },
-                ],
-            },
-        }
-        result = format_test_results(response, "failure", 3.5)
-
-        assert "✓ Tests Passed: 408" in result
-        assert "✗ Tests Failed: 2" in result
-        assert "○ Tests Skipped: 1" in result
-        assert "Failed Tests:" in result
-        assert "MXR.Tests.AuthTests.LoginTest" in result
-        assert "Expected: success" in result
-        assert "MXR.Tests.NetworkTests.TimeoutTest" in result
-
-
-class TestFormatCompileResults:
-    """Test formatting of compilation results"""
-
-    def test_compile_success(self):
-        response = {"status": "success"}
-        result = format_compile_results(response, "success", 2.3)
-
-        assert "✓ Compilation Successful" in result
-        assert "Duration: 2.30s" in result
-
-    def test_compile_failure(self):
-        error_msg = (
-            "Assets/Scripts/Player.cs(25,10): " "error CS0103: The name 'invalidVar' does not exist"
-        )
-        response = {"status": "failure", "error": error_msg}
-        result = format_compile_results(response, "failure", 1.8)
-
-        assert "✗ Compilation Failed" in result
-        assert "invalidVar" in result
-
-
-class TestFormatConsoleLogs:
-    """Test formatting of console logs"""
-
-    def test_console_logs_with_errors(self):
-        response = {
-            "consoleLogs": [
-                {
-                    "message": "NullReferenceException: Object reference not set",
-                    "stackTrace": "Player.Update () (at Assets/Scripts/Player.cs:34)",
-                    "type": "Error",
-                    "count": 1,
-                },
-                {
-                    "message": "Shader compilation succeeded",
-                    "stackTrace": "",
-                    "type": "Log",
-                    "count": 3,
-                },
-            ]
-        }
-        result = format_console_logs(response)
-
-        assert "Console Logs" in result
-        assert "[Error]" in result
-        assert "NullReferenceException" in result
-        assert "Player.Update" in result
-        assert "[Log] (x3)" in result
-        assert "Shader compilation succeeded" in result
-
-    def test_console_logs_empty(self):
-        response = {"consoleLogs": []}
-        result = format_console_logs(response)
-
-        assert "No console logs found" in result
-
-
-class TestFormatEditorStatus:
-    """Test formatting of editor status"""
-
-    def test_editor_ready(self):
-        response = {
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": False,
-                "isPaused": False,
-            }
-        }
-        result = format_editor_status(response)
-
-        assert "Unity Editor Status:" in result
-        assert "✓ Ready" in result
-        assert "✏ Editing" in result
-
-    def test_editor_compiling(self):
-        response = {
-            "editorStatus": {
-                "isCompiling": True,
-                "isUpdating": False,
-                "isPlaying": False,
-                "isPaused": False,
-            }
-        }
-        result = format_editor_status(response)
-
-        assert "⏳ Compiling..." in result
-
-    def test_editor_playing(self):
-        response = {
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": False,
-            }
-        }
-        result = format_editor_status(response)
-
-        assert "▶ Playing" in result
-
-    def test_editor_paused(self):
-        response = {
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": True,
-            }
-        }
-        result = format_editor_status(response)
-
-        assert "⏸ Paused" in result
-
-    def test_editor_status_missing(self):
-        """Test response when editorStatus field is missing"""
-        response = {}
-        result = format_editor_status(response)
-
-        assert "Unknown" in result
-
-
-class TestFormatRefreshResults:
-    """Test formatting of refresh results"""
-
-    def test_refresh_success(self):
-        response = {"status": "success"}
-        result = format_refresh_results(response, "success", 0.5)
-
-        assert "✓ Asset Database Refreshed" in result
-        assert "Duration: 0.50s" in result
-
-    def test_refresh_failure(self):
-        response = {"status": "failure", "error": "Failed to refresh: I/O error"}
-        result = format_refresh_results(response, "failure", 0.3)
 
-        assert "✗ Refresh Failed" in result
-        assert "I/O error" in result
-
-
-class TestFormatPlayModeResult:
-    """Test formatting of play/pause/step results"""
-
-    def test_play_enter_play_mode(self):
-        response = {
-            "action": "play",
-            "status": "success",
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": False,
-            },
-        }
-        result = format_play_mode_result(response, "success", 0.01)
-
-        assert "✓ play completed" in result
-        assert "▶ Playing" in result
-        assert "Duration: 0.01s" in result
-
-    def test_play_exit_play_mode(self):
-        response = {
-            "action": "play",
-            "status": "success",
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": False,
-                "isPaused": False,
-            },
-        }
-        result = format_play_mode_result(response, "success", 0.01)
-
-        assert "✓ play completed" in result
-        assert "⏹ Stopped" in result
-
-    def test_pause_while_playing(self):
-        response = {
-            "action": "pause",
-            "status": "success",
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": True,
-            },
-        }
-        result = format_play_mode_result(response, "success", 0.01)
-
-        assert "✓ pause completed" in result
-        assert "⏸ Paused" in result
-
-    def test_unpause_while_playing(self):
-        response = {
-            "action": "pause",
-            "status": "success",
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": False,
-            },
-        }
-        result = format_play_mode_result(response, "success", 0.01)
-
-        assert "✓ pause completed" in result
-        assert "▶ Playing" in result
-
-    def test_step_while_playing(self):
-        response = {
-            "action": "step",
-            "status": "success",
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": True,
-            },
-        }
-        result = format_play_mode_result(response, "success", 0.02)
-
-        assert "✓ step completed" in result
-        assert "⏸ Paused" in result
-        assert "Duration: 0.02s" in result
-
-    def test_failure_response(self):
-        response = {
-            "action": "pause",
-            "status": "failure",
-            "error": "Cannot pause: not in play mode",
-        }
-        result = format_play_mode_result(response, "failure", 0.01)
+def _symlinks_supported():
+    """Whether this platform lets an unprivileged process create symlinks."""
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            os.symlink(tmp, os.path.join(tmp, "link"))
+        except (OSError, NotImplementedError):
+            return False
+    return True
 
-        assert "✗ pause failed" in result
-        assert "Cannot pause: not in play mode" in result
 
-    def test_missing_editor_status_falls_through(self):
-        response = {
-            "action": "play",
-            "status": "success",
-        }
-        result = format_play_mode_result(response, "success", 0.01)
+# Windows without Developer Mode refuses symlink creation; decide once at collection.
+requires_symlinks = pytest.mark.skipif(
+    not _symlinks_supported(), reason="Symlink creation not supported"
+)
 
-        # Should fall through to generic formatting
-        assert "play completed successfully" in result
 
+def _assert_in_stderr(capsys, *needles):
+    """Read captured stderr once and report every missing needle together."""
+    err = capsys.readouterr().err
+    missing = [needle for needle in needles if needle not in err]
+    assert not missing, f"missing from stderr: {missing}\n---\n{err}"
+
+
+def _place_aged_files(base, specs):
+    """Create (name, content, age in seconds) files under base; returns their paths."""
+    base.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    paths = []
+    for name, content, age in specs:
+        path = base / name
+        path.write_text(content)
+        if age:
+            os.utime(path, (now - age, now - age))
+        paths.append(path)
+    return paths
+
+
+READY_EDITOR_STATUS = {
+    "isCompiling": False,
+    "isUpdating": False,
+    "isPlaying": False,
+    "isPaused": False,
+}
+
+
+def _status_response(command_id, action="get-status", **editor_status):
+    """A successful response carrying editorStatus, as Unity sends for get-status and play mode."""
+    return {
+        "id": command_id,
+        "status": "success",
+        "action": action,
+        "duration_ms": 10,
+        "editorStatus": {**READY_EDITOR_STATUS, **editor_status},
+    }
+
+
+PLACEHOLDER_ID = "00000000-0000-0000-0000-000000000000"
+# Any valid id will do; unity_dir starts empty, so tests can all share this one
+COMMAND_ID = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
+SUCCESS_STATUS_JSON = _dumps(_status_response(PLACEHOLDER_ID))
+SUCCESS_COMPILE_JSON = _dumps(
+    {"id": PLACEHOLDER_ID, "status": "success", "action": "compile", "duration_ms": 100}
+)
+SUCCESS_REFRESH_JSON = _dumps(
+    {"id": PLACEHOLDER_ID, "status": "success", "action": "refresh", "duration_ms": 50}
+)
+SUCCESS_RUN_TESTS_JSON = _dumps(
+    {
+        "id": PLACEHOLDER_ID,
+        "status": "success",
+        "action": "run-tests",
+        "duration_ms": 100,
+        "result": {"passed": 5, "failed": 0, "skipped": 0, "failures": []},
+    }
+)
+SUCCESS_CONSOLE_LOGS_JSON = _dumps(
+    {"id": PLACEHOLDER_ID, "status": "success", "action": "get-console-logs", "consoleLogs": []}
+)
+SUCCESS_BUILD_JSON = _dumps(
+    {"id": PLACEHOLDER_ID, "status": "success", "action": "build", "duration_ms": 100}
+)
 
-class TestFormatBuildResults:
-    """Test formatting of build results"""
 
-    def test_direct_build_success(self):
-        response = {
-            "status": "success",
-            "buildInfo": {
-                "buildResult": "Succeeded",
-                "totalErrors": 0,
-                "totalWarnings": 3,
-                "totalSeconds": 45.2,
-                "outputPath": "/path/to/Build_Android.apk",
-                "sizeBytes": 123456789,
-                "method": "direct",
-            },
-        }
-        result = format_build_results(response, "success", 45.5)
-
-        assert "Build Succeeded" in result
-        assert "Errors: 0" in result
-        assert "Warnings: 3" in result
-        assert "Build Time: 45.2s" in result
-        assert "Output: /path/to/Build_Android.apk" in result
-        assert "Size:" in result
-        assert "Duration: 45.50s" in result
-
-    def test_method_build_success(self):
-        response = {
-            "status": "success",
-            "buildInfo": {
-                "buildResult": "Succeeded",
-                "totalErrors": 0,
-                "totalWarnings": 0,
-                "totalSeconds": 120.5,
-                "outputPath": "",
-                "sizeBytes": 0,
-                "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
-            },
-        }
-        result = format_build_results(response, "success", 121.0)
+def _responding_write(unity_dir, command_id, response_json):
+    """A write_command stand-in that answers at once with a pre-serialized response."""
+    payload = response_json.replace(PLACEHOLDER_ID.encode(), command_id.encode())
 
-        assert "Build Succeeded" in result
-        assert "Method: MXR.Builder.BuildEntryPoints.BuildQuest" in result
-        assert "Build Time: 120.5s" in result
+    def mock_write(action, params):
+        (unity_dir / f"response-{command_id}.json").write_bytes(payload)
+        return command_id
 
-    def test_build_failure(self):
-        response = {
-            "status": "failure",
-            "error": "Build Failed: 5 error(s), 2 warning(s)",
-            "buildInfo": {
-                "buildResult": "Failed",
-                "totalErrors": 5,
-                "totalWarnings": 2,
-                "totalSeconds": 30.0,
-                "outputPath": "",
-                "sizeBytes": 0,
-                "method": "direct",
-            },
-        }
-        result = format_build_results(response, "failure", 30.5)
+    return mock_write
 
-        assert "Build Failed" in result
-        assert "Errors: 5" in result
-        assert "Warnings: 2" in result
 
-    def test_build_no_build_info(self):
-        """Falls back to generic format when buildInfo is missing"""
-        response = {
-            "status": "success",
-        }
-        result = format_build_results(response, "success", 10.0)
+def _make_existing_install(path, kind, scratch):
+    """Occupy a skill target path with a prior install of the given kind.
 
-        assert "Build Succeeded" in result
-        assert "Duration: 10.00s" in result
-
-    def test_build_size_formatting(self):
-        response = {
-            "status": "success",
-            "buildInfo": {
-                "buildResult": "Succeeded",
-                "totalErrors": 0,
-                "totalWarnings": 0,
-                "totalSeconds": 10.0,
-                "outputPath": "/path/to/build",
-                "sizeBytes": 52428800,
-                "method": "direct",
-            },
-        }
-        result = format_build_results(response, "success", 10.0)
-
-        assert "50.0 MB" in result
+    "symlink" points at a scratch copy of an old skill, "directory" holds an old
+    file, "skill" is a copied install with SKILL.md, and "file" is a plain file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if kind == "symlink":
+        old_target = scratch / "old_skill"
+        old_target.mkdir()
+        (old_target / "old_file.txt").write_text("old")
+        path.symlink_to(old_target)
+    elif kind == "directory":
+        path.mkdir()
+        (path / "old_file.txt").write_text("old")
+    elif kind == "skill":
+        path.mkdir()
+        (path / "SKILL.md").write_text("# Skill")
+        (path / "scripts").mkdir()
+    else:
+        path.write_text("not a symlink or directory")
+    return path
 
 
 class TestLoadBuildConfig:
@@ -456,7 +215,7 @@ class TestLoadBuildConfig:
         }
         config_file = tmp_path / ".unity-bridge" / "build.json"
         config_file.parent.mkdir(parents=True, exist_ok=True)
-        config_file.write_text(json.dumps(config))
+        _write_json(config_file, config)
 
         result = load_build_config(tmp_path / ".unity-bridge")
         assert result is not None
@@ -491,7 +250,7 @@ class TestLoadBuildConfig:
         }
         config_file = tmp_path / ".unity-bridge" / "build.json"
         config_file.parent.mkdir(parents=True, exist_ok=True)
-        config_file.write_text(json.dumps(config))
+        _write_json(config_file, config)
 
         build_config = load_build_config(tmp_path / ".unity-bridge")
         profile = build_config["profiles"]["quest"]
@@ -502,1208 +261,1057 @@ class TestLoadBuildConfig:
         assert profile["timeout"] == 600
 
 
-class TestFormatResponse:
-    """Test main format_response function"""
-
-    def test_format_error_status(self):
-        response = {
-            "status": "error",
-            "error": "Cannot compile while Unity is updating",
-        }
-        result = format_response(response, "compile")
-
-        assert "✗ Error:" in result
-        assert "Cannot compile while Unity is updating" in result
-
-    def test_format_run_tests(self):
-        response = {
-            "status": "success",
-            "duration_ms": 1250,
-            "result": {"passed": 10, "failed": 0, "skipped": 0, "failures": []},
-        }
-        result = format_response(response, "run-tests")
-
-        assert "✓ Tests Passed: 10" in result
-
-
 class TestWriteCommand:
     """Test command writing"""
 
-    def test_write_command_creates_file(self, tmp_path):
-        # Patch UNITY_DIR to use temp directory
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = write_command("test-action", {"param": "value"})
+    @pytest.mark.parametrize("subdir", [".", "nested/unity"])
+    def test_write_command_creates_file(self, tmp_path, monkeypatch, subdir):
+        unity_dir = tmp_path / subdir
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
 
-            # Check UUID format
-            assert len(command_id) == 36
-            assert command_id.count("-") == 4
+        command_id = write_command("test-action", {"param": "value"})
 
-            # Check file exists
-            command_file = tmp_path / "command.json"
-            assert command_file.exists()
+        # Check UUID format
+        assert len(command_id) == 36
+        assert command_id.count("-") == 4
 
-            # Check content
-            content = json.loads(command_file.read_text())
-            assert content["id"] == command_id
-            assert content["action"] == "test-action"
-            assert content["params"]["param"] == "value"
+        # Check file exists
+        command_file = unity_dir / "command.json"
+        assert command_file.exists()
 
-    def test_write_command_creates_directory(self, tmp_path):
-        unity_dir = tmp_path / "nested" / "unity"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            write_command("test", {})
-            assert unity_dir.exists()
+        # Check content
+        content = json.loads(command_file.read_text())
+        assert content["id"] == command_id
+        assert content["action"] == "test-action"
+        assert content["params"]["param"] == "value"
 
 
 class TestWaitForResponse:
     """Test response waiting and polling"""
 
-    def test_wait_for_response_success(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
-            response_data = {"id": command_id, "status": "success", "action": "test"}
+    def test_wait_for_response_success(self, unity_dir):
+        command_id = COMMAND_ID
+        response_data = {"id": command_id, "status": "success", "action": "test"}
 
-            # Create response file
-            response_file = tmp_path / f"response-{command_id}.json"
-            response_file.write_text(json.dumps(response_data))
+        # Create response file
+        response_file = unity_dir / f"response-{command_id}.json"
+        _write_json(response_file, response_data)
 
-            # Should return immediately
-            result = wait_for_response(command_id, timeout=1)
-            assert result == response_data
-
-    def test_wait_for_response_timeout(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Create directory to simulate Unity running
-            tmp_path.mkdir(exist_ok=True)
-
-            with pytest.raises(CommandTimeoutError) as exc_info:
-                wait_for_response("b2c3d4e5-f6a7-8901-bcde-f12345678901", timeout=1)
+        # Should return immediately
+        result = wait_for_response(command_id, timeout=1)
+        assert result == response_data
 
-            assert "timed out after 1s" in str(exc_info.value)
+    def test_wait_for_response_timeout(self, unity_dir, virtual_clock):
+        # The fixture's directory exists, as it does while Unity is running
+        with pytest.raises(CommandTimeoutError, match="timed out after 1s"):
+            wait_for_response(COMMAND_ID, timeout=1)
 
-    def test_wait_for_response_unity_not_running(self, tmp_path):
+    def test_wait_for_response_unity_not_running(self, tmp_path, virtual_clock, monkeypatch):
         # Don't create directory to simulate Unity not running
         nonexistent_dir = tmp_path / "does-not-exist"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", nonexistent_dir):
-            with pytest.raises(UnityNotRunningError) as exc_info:
-                wait_for_response("c3d4e5f6-a7b8-9012-cdef-123456789012", timeout=1)
-
-            assert "Unity Editor not detected" in str(exc_info.value)
+        monkeypatch.setattr(cli, "UNITY_DIR", nonexistent_dir)
+        with pytest.raises(UnityNotRunningError, match="Unity Editor not detected"):
+            wait_for_response(COMMAND_ID, timeout=1)
 
 
 class TestCleanupOldResponses:
     """Test cleanup functionality"""
 
-    def test_cleanup_old_responses(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Create some response files
-            old_file = tmp_path / "response-old-123.json"
-            recent_file = tmp_path / "response-recent-456.json"
-
-            old_file.write_text('{"id": "old-123"}')
-            recent_file.write_text('{"id": "recent-456"}')
-
-            # Make old file appear old
-            import os
-            import time
-
-            old_time = time.time() - 7200  # 2 hours ago
-            os.utime(old_file, (old_time, old_time))
+    def test_cleanup_old_responses(self, unity_dir):
+        old_file, recent_file = _place_aged_files(
+            unity_dir,
+            [
+                ("response-old-123.json", '{"id": "old-123"}', 7200),  # 2 hours ago
+                ("response-recent-456.json", '{"id": "recent-456"}', 0),
+            ],
+        )
 
-            # Run cleanup (max age 1 hour)
-            cleanup_old_responses(max_age_hours=1)
+        # Run cleanup (max age 1 hour)
+        cleanup_old_responses(max_age_hours=1)
 
-            # Old file should be deleted, recent file should remain
-            assert not old_file.exists()
-            assert recent_file.exists()
+        # Old file should be deleted, recent file should remain
+        assert not old_file.exists()
+        assert recent_file.exists()
 
-    def test_cleanup_no_directory(self, tmp_path):
+    def test_cleanup_no_directory(self, tmp_path, monkeypatch):
         # Should not raise error if directory doesn't exist
         nonexistent_dir = tmp_path / "does-not-exist"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", nonexistent_dir):
-            cleanup_old_responses()  # Should not raise
+        monkeypatch.setattr(cli, "UNITY_DIR", nonexistent_dir)
+        cleanup_old_responses()  # Should not raise
+
+    def test_cleanup_unity_dir_is_file(self, tmp_path, monkeypatch):
+        # Should not raise error if .unity-bridge is a plain file
+        not_a_dir = tmp_path / ".unity-bridge"
+        not_a_dir.write_text("")
+        monkeypatch.setattr(cli, "UNITY_DIR", not_a_dir)
+        cleanup_old_responses()  # Should not raise
 
 
 class TestIntegration:
-    """Integration tests"""
+    """Integration tests
 
-    def test_full_command_cycle(self, tmp_path):
+    These deliberately use the real filesystem, since the platform-specific
+    command write and response read paths are what they cover. Logic tests
+    that don't need real I/O stub _read_file instead.
+    """
+
+    def test_full_command_cycle(self, unity_dir):
         """Test writing command, waiting for response, and formatting"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Write command
-            command_id = write_command("get-status", {})
+        # Write command
+        command_id = write_command("get-status", {})
 
-            # Simulate Unity response (new editorStatus format)
-            response_data = {
-                "id": command_id,
-                "status": "success",
-                "action": "get-status",
-                "duration_ms": 10,
-                "editorStatus": {
-                    "isCompiling": False,
-                    "isUpdating": False,
-                    "isPlaying": False,
-                    "isPaused": False,
-                },
-            }
-            response_file = tmp_path / f"response-{command_id}.json"
-            response_file.write_text(json.dumps(response_data))
+        # Simulate Unity response (new editorStatus format)
+        response_data = _status_response(command_id)
+        response_file = unity_dir / f"response-{command_id}.json"
+        _write_json(response_file, response_data)
 
-            # Wait for response
-            response = wait_for_response(command_id, timeout=1)
+        # Wait for response
+        response = wait_for_response(command_id, timeout=1)
 
-            # Format response
-            formatted = format_response(response, "get-status")
+        # Format response
+        formatted = format_response(response, "get-status")
 
-            # Verify
-            assert "Unity Editor Status:" in formatted
-            assert "✓ Ready" in formatted
+        # Verify
+        assert "Unity Editor Status:" in formatted
+        assert "✓ Ready" in formatted
 
 
-class TestFormatGenericResponse:
-    """Test generic response formatting"""
+class TestCleanupResponseFile:
+    """Test cleanup_response_file function"""
 
-    def test_generic_success(self):
-        response = {"action": "custom-action", "status": "success"}
-        result = format_generic_response(response, "success", 1.5)
+    def test_cleanup_existing_file(self, unity_dir):
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
+        response_file.write_text('{"id": "test"}')
 
-        assert "✓ custom-action completed successfully" in result
-        assert "Duration: 1.50s" in result
+        cleanup_response_file(command_id)
+        assert not response_file.exists()
 
-    def test_generic_failure(self):
-        response = {
-            "action": "custom-action",
-            "status": "failure",
-            "error": "Something broke",
-        }
-        result = format_generic_response(response, "failure", 0.5)
+    def test_cleanup_nonexistent_file(self, unity_dir, capsys):
+        # Should not raise error, or warn about a file that was never written
+        cleanup_response_file(COMMAND_ID, verbose=True)
 
-        assert "✗ custom-action failed: Something broke" in result
+        assert capsys.readouterr().err == ""
 
-    def test_generic_unknown_status(self):
-        response = {"action": "custom-action", "status": "pending"}
-        result = format_generic_response(response, "pending", 0.1)
+    def test_cleanup_with_verbose(self, unity_dir, capsys):
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
+        response_file.write_text('{"id": "test"}')
 
-        assert "custom-action status: pending" in result
+        cleanup_response_file(command_id, verbose=True)
 
+        _assert_in_stderr(capsys, "Cleaned up response file")
 
-class TestFormatResponseBranches:
-    """Test format_response routing to different formatters"""
 
-    def test_format_compile(self):
-        response = {"status": "success", "duration_ms": 1000}
-        result = format_response(response, "compile")
-        assert "Compilation Successful" in result
+class TestCleanupOldResponsesVerbose:
+    """Test cleanup_old_responses verbose mode"""
 
-    def test_format_get_console_logs(self):
-        response = {"consoleLogs": []}
-        result = format_response(response, "get-console-logs")
-        assert "No console logs found" in result
+    def test_cleanup_verbose_output(self, unity_dir, capsys, virtual_clock):
+        old_file = unity_dir / "response-old-verbose.json"
+        old_file.write_text('{"id": "old"}')
 
-    def test_format_refresh(self):
-        response = {"status": "success", "duration_ms": 500}
-        result = format_response(response, "refresh")
-        assert "Asset Database Refreshed" in result
+        virtual_clock.now = time.time() + 7200
+        cleanup_old_responses(max_age_hours=1, verbose=True)
 
-    def test_format_play(self):
-        response = {
-            "status": "success",
-            "action": "play",
-            "duration_ms": 10,
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": False,
-            },
-        }
-        result = format_response(response, "play")
-        assert "play completed" in result
-        assert "▶ Playing" in result
+        _assert_in_stderr(capsys, "Cleaned up")
 
-    def test_format_pause(self):
-        response = {
-            "status": "success",
-            "action": "pause",
-            "duration_ms": 10,
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": True,
-            },
-        }
-        result = format_response(response, "pause")
-        assert "pause completed" in result
-        assert "⏸ Paused" in result
 
-    def test_format_step(self):
-        response = {
-            "status": "success",
-            "action": "step",
-            "duration_ms": 10,
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": False,
-                "isPlaying": True,
-                "isPaused": True,
-            },
-        }
-        result = format_response(response, "step")
-        assert "step completed" in result
-
-    def test_format_play_error(self):
-        response = {
-            "status": "error",
-            "action": "pause",
-            "error": "Cannot pause: Unity Editor is not in Play Mode.",
-        }
-        result = format_response(response, "pause")
-        assert "✗ Error:" in result
-        assert "not in Play Mode" in result
+def _block_unity_dir(tmp_path, monkeypatch):
+    # A file where the directory should be makes mkdir fail
+    blocking_file = tmp_path / "blocking"
+    blocking_file.write_text("blocking")
+    monkeypatch.setattr(cli, "UNITY_DIR", blocking_file / "unity")
 
-    def test_format_unknown_action(self):
-        response = {"action": "unknown-action", "status": "success", "duration_ms": 100}
-        result = format_response(response, "unknown-action")
-        assert "completed successfully" in result
 
+def _fail_command_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "UNITY_DIR", tmp_path)
+    monkeypatch.setattr(cli.os, "write", Mock(side_effect=PermissionError("Permission denied")))
 
-class TestFormatCompileEdgeCases:
-    """Test compile formatting edge cases"""
 
-    def test_compile_failure_no_error(self):
-        response = {"status": "failure"}
-        result = format_compile_results(response, "failure", 1.0)
-        assert "✗ Compilation Failed" in result
-        assert "Duration: 1.00s" in result
+class TestWriteCommandErrors:
+    """Test error handling in write_command"""
 
-    def test_compile_unknown_status(self):
-        response = {"status": "running"}
-        result = format_compile_results(response, "running", 0.5)
-        assert "Compilation Status: running" in result
+    @pytest.mark.parametrize(
+        "break_setup, message",
+        [
+            (_block_unity_dir, "Failed to create Unity directory"),
+            (_fail_command_writes, "Failed to write command file"),
+        ],
+    )
+    def test_write_command_failure(self, tmp_path, monkeypatch, break_setup, message):
+        break_setup(tmp_path, monkeypatch)
+
+        with pytest.raises(UnityCommandError, match=message):
+            write_command("test", {})
 
+        assert not list(tmp_path.rglob("*.tmp"))
 
-class TestFormatRefreshEdgeCases:
-    """Test refresh formatting edge cases"""
+    def test_write_command_writes_compact_json(self, unity_dir):
+        """The command file is compact, with no indentation or spacing"""
+        write_command("test", {"param": "value"})
 
-    def test_refresh_unknown_status(self):
-        response = {"status": "running"}
-        result = format_refresh_results(response, "running", 0.3)
-        assert "Refresh Status: running" in result
+        content = (unity_dir / "command.json").read_text()
+        assert "\n" not in content
+        assert ", " not in content and ": " not in content
 
+    @pytest.mark.skipif(sys.platform != "linux", reason="O_TMPFILE is Linux-only")
+    def test_anonymous_file_linked_into_place(self, tmp_path):
+        """On Linux the command file is created without an intermediate temp file"""
+        target = tmp_path / "command.json"
 
-class TestFormatEditorStatusEdgeCases:
-    """Test editor status formatting edge cases"""
+        if not _link_anonymous_file(target, b'{"id":"x"}'):
+            pytest.skip("filesystem does not support O_TMPFILE")
 
-    def test_editor_updating(self):
-        response = {
-            "editorStatus": {
-                "isCompiling": False,
-                "isUpdating": True,
-                "isPlaying": False,
-                "isPaused": False,
-            }
-        }
-        result = format_editor_status(response)
-        assert "⏳ Yes" in result
-
-    def test_editor_missing_status(self):
-        """Test response when editorStatus field is missing"""
-        response = {"status": "success"}
-        result = format_editor_status(response)
-        assert "Unknown" in result
-
-
-class TestFormatConsoleLogsEdgeCases:
-    """Test console logs formatting edge cases"""
-
-    def test_console_logs_with_warning(self):
-        response = {
-            "consoleLogs": [
-                {
-                    "message": "Deprecated API usage",
-                    "stackTrace": "",
-                    "type": "Warning",
-                    "count": 1,
-                }
+        assert target.read_bytes() == b'{"id":"x"}'
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["command.json"]
+
+    def test_anonymous_file_does_not_overwrite(self, tmp_path):
+        """An existing command file is left for the temp-file + rename path"""
+        target = tmp_path / "command.json"
+        target.write_text("pending")
+
+        assert not _link_anonymous_file(target, b"{}")
+        assert target.read_text() == "pending"
+
+    def test_write_command_overwrites_pending_command(self, unity_dir):
+        """write_command still replaces a command.json Unity hasn't consumed"""
+        (unity_dir / "command.json").write_text("pending")
+
+        command_id = write_command("test", {})
+
+        data = json.loads((unity_dir / "command.json").read_text())
+        assert data["id"] == command_id
+        assert not (unity_dir / "command.tmp").exists()
+
+    def test_write_command_encodes_utf8_directly(self, unity_dir):
+        """Non-ASCII parameters are written as UTF-8, with or without orjson"""
+        write_command("run-tests", {"filter": "Tëst"})
+        raw = (unity_dir / "command.json").read_bytes()
+
+        assert "Tëst".encode("utf-8") in raw
+        assert cli._dumps({"a": "é"}) == '{"a":"é"}'.encode("utf-8")
+
+    def test_write_command_replaces_stale_temp_file(self, unity_dir):
+        """A temp file left by an interrupted run doesn't block the exclusive create"""
+        (unity_dir / "command.tmp").write_text("stale")
+
+        command_id = write_command("test", {})
+
+        data = json.loads((unity_dir / "command.json").read_text())
+        assert data["id"] == command_id
+        assert not (unity_dir / "command.tmp").exists()
+
+
+class TestWaitForResponseEdgeCases:
+    """Test edge cases in wait_for_response"""
+
+    def test_wait_verbose_polling(self, unity_dir, capsys):
+        command_id = COMMAND_ID
+        response_data = {"id": command_id, "status": "success"}
+        read_after_polls = Mock(side_effect=[FileNotFoundError()] * 10 + [_dumps(response_data)])
+
+        # The response appears after ten polls; sleeping is skipped entirely
+        with patch("claude_unity_bridge.cli._read_file", read_after_polls):
+            with patch("claude_unity_bridge.cli._watch_response_file", return_value=None):
+                with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+                    result = wait_for_response(command_id, timeout=2, verbose=True)
+
+        assert result == response_data
+        assert mock_sleep.call_count == 10
+        assert "Waiting for response..." in capsys.readouterr().err
+
+    def test_wait_json_decode_error_recovery(self, unity_dir, virtual_clock):
+        """Test that mid-write JSON errors are retried up to PARSE_RETRIES times"""
+        command_id = COMMAND_ID
+        # The first read catches the file mid-write
+        mock_read = Mock(
+            side_effect=[b"{ invalid", _dumps({"id": command_id, "status": "success"})]
+        )
+
+        with patch("claude_unity_bridge.cli._read_file", mock_read):
+            result = wait_for_response(command_id, timeout=2, verbose=True)
+            assert result["status"] == "success"
+
+    def test_wait_retry_tolerates_file_being_replaced(self, unity_dir, virtual_clock):
+        """A response that vanishes during the mid-write retry is waited for again"""
+        command_id = COMMAND_ID
+        mock_read = Mock(
+            side_effect=[
+                b"{ partial",
+                FileNotFoundError(),
+                _dumps({"id": command_id, "status": "success"}),
             ]
-        }
-        result = format_console_logs(response)
-        assert "[Warning]" in result
+        )
 
-    def test_console_logs_with_filter(self):
-        response = {
-            "consoleLogs": [{"message": "test", "type": "Error", "stackTrace": "", "count": 1}],
-            "params": {"filter": "Error"},
-        }
-        result = format_console_logs(response)
-        assert "filtered by Error" in result
+        with patch("claude_unity_bridge.cli._read_file", mock_read):
+            result = wait_for_response(command_id, timeout=5)
 
+        assert result["status"] == "success"
 
-class TestCleanupResponseFile:
-    """Test cleanup_response_file function"""
+    def test_wait_retries_while_partial_response_grows(self, unity_dir, virtual_clock):
+        """A partial response that keeps growing is not failed after PARSE_RETRIES"""
+        command_id = COMMAND_ID
+        complete = _dumps({"id": command_id, "status": "success"})
+        mock_read = Mock(
+            side_effect=[complete[:n] for n in range(1, PARSE_RETRIES + 5)] + [complete]
+        )
 
-    def test_cleanup_existing_file(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "d4e5f6a7-b8c9-0123-defa-234567890123"
-            response_file = tmp_path / f"response-{command_id}.json"
-            response_file.write_text('{"id": "test"}')
+        with patch("claude_unity_bridge.cli._read_file", mock_read):
+            result = wait_for_response(command_id, timeout=5)
 
-            cleanup_response_file(command_id)
-            assert not response_file.exists()
+        assert result["status"] == "success"
 
-    def test_cleanup_nonexistent_file(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Should not raise error
-            cleanup_response_file("e5f6a7b8-c9d0-1234-efab-345678901234")
+    def test_wait_json_decode_error_persistent(self, unity_dir, capsys, virtual_clock):
+        """Test that persistent JSON errors raise an exception"""
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
 
-    def test_cleanup_with_verbose(self, tmp_path, capsys):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "f6a7b8c9-d0e1-2345-fabc-456789012345"
-            response_file = tmp_path / f"response-{command_id}.json"
-            response_file.write_text('{"id": "test"}')
+        # Write invalid JSON that stays invalid
+        response_file.write_text("{ not valid json at all")
 
-            cleanup_response_file(command_id, verbose=True)
+        with pytest.raises(UnityCommandError, match="Failed to parse response JSON"):
+            wait_for_response(command_id, timeout=2, verbose=True)
 
-            captured = capsys.readouterr()
-            assert "Cleaned up response file" in captured.err
+        _assert_in_stderr(capsys, "Warning: Failed to parse response")
 
+    def test_wait_parses_with_stdlib_json_fallback(self, unity_dir):
+        """Responses parse with the stdlib json module when orjson is absent"""
+        command_id = COMMAND_ID
+        response_data = {"id": command_id, "status": "success", "result": "caf\u00e9"}
+        response_file = unity_dir / f"response-{command_id}.json"
+        response_file.write_bytes(json.dumps(response_data).encode())
 
-class TestCleanupOldResponsesVerbose:
-    """Test cleanup_old_responses verbose mode"""
+        with patch("claude_unity_bridge.cli._loads", json.loads):
+            result = wait_for_response(command_id, timeout=1)
 
-    def test_cleanup_verbose_output(self, tmp_path, capsys):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            old_file = tmp_path / "response-old-verbose.json"
-            old_file.write_text('{"id": "old"}')
+        assert result == response_data
 
-            import os
+    def test_read_file_returns_contents(self, tmp_path):
+        path = tmp_path / "response.json"
+        path.write_bytes(b'{"id": "x"}' * 10000)
 
-            old_time = time.time() - 7200
-            os.utime(old_file, (old_time, old_time))
+        assert _read_file(path) == b'{"id": "x"}' * 10000
 
-            cleanup_old_responses(max_age_hours=1, verbose=True)
+    def test_read_file_retries_without_noatime(self, tmp_path):
+        """Files owned by another user can't be opened with O_NOATIME"""
+        path = tmp_path / "response.json"
+        path.write_bytes(b"{}")
+        real_open = os.open
+        calls = []
 
-            captured = capsys.readouterr()
-            assert "Cleaned up" in captured.err
+        def open_without_noatime(file, flags, *args):
+            calls.append(flags)
+            if flags & 0x40000:
+                raise PermissionError(1, "Operation not permitted")
+            return real_open(file, flags, *args)
 
+        with patch("claude_unity_bridge.cli._O_NOATIME", 0x40000):
+            with patch("claude_unity_bridge.cli.os.open", open_without_noatime):
+                assert _read_file(path) == b"{}"
 
-class TestWriteCommandErrors:
-    """Test error handling in write_command"""
+        assert len(calls) == 2
 
-    def test_write_command_mkdir_failure(self, tmp_path):
-        # Create a file where the directory should be to cause mkdir to fail
-        blocking_file = tmp_path / "blocking"
-        blocking_file.write_text("blocking")
-        unity_dir = blocking_file / "unity"
 
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            with pytest.raises(UnityCommandError) as exc_info:
-                write_command("test", {})
-            assert "Failed to create Unity directory" in str(exc_info.value)
+class TestResponseWatching:
+    """Test event-driven waiting and its polling fallback"""
 
-    def test_write_command_file_write_failure(self, tmp_path):
-        # Make the directory read-only to cause write failure
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            tmp_path.mkdir(parents=True, exist_ok=True)
-            # Mock Path.write_text to raise an exception
-            with patch.object(Path, "write_text", side_effect=PermissionError("Permission denied")):
-                with pytest.raises(UnityCommandError) as exc_info:
-                    write_command("test", {})
-                assert "Failed to write command file" in str(exc_info.value)
+    def test_watch_unavailable_without_watchfiles(self, tmp_path):
+        """Without watchfiles installed, waiting falls back to polling"""
+        with patch.dict(sys.modules, {"watchfiles": None}):
+            assert _watch_response_file(tmp_path / "response-x.json") is None
 
+    def test_watch_unavailable_without_directory(self, tmp_path):
+        """No watch is started when the bridge directory doesn't exist"""
+        assert _watch_response_file(tmp_path / "missing" / "response-x.json") is None
 
-class TestWaitForResponseEdgeCases:
-    """Test edge cases in wait_for_response"""
+    def test_polling_fallback_waits_and_backs_off(self):
+        with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+            watcher, sleep_time = _wait_for_change(None, MIN_SLEEP)
+
+        mock_sleep.assert_called_once_with(MIN_SLEEP)
+        assert watcher is None
+        assert sleep_time == pytest.approx(MIN_SLEEP * SLEEP_MULTIPLIER)
+
+    def test_polling_backoff_capped(self):
+        with patch("claude_unity_bridge.cli.time.sleep"):
+            _, sleep_time = _wait_for_change(None, MAX_SLEEP)
+
+        assert sleep_time == MAX_SLEEP
 
-    def test_wait_verbose_polling(self, tmp_path, capsys):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "a7b8c9d0-e1f2-3456-abcd-567890123456"
-            response_data = {"id": command_id, "status": "success"}
+    def test_polling_wait_clamped_to_deadline(self):
+        """A poll interval never sleeps past the command deadline"""
+        with patch("claude_unity_bridge.cli.time.time", return_value=100.0):
+            with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+                _, sleep_time = _wait_for_change(None, MAX_SLEEP, deadline=100.25)
 
-            # Create response file after a small delay
-            def create_response():
-                time.sleep(0.15)
-                response_file = tmp_path / f"response-{command_id}.json"
-                response_file.write_text(json.dumps(response_data))
+        mock_sleep.assert_called_once_with(0.25)
+        assert sleep_time == MAX_SLEEP
 
-            import threading
+    def test_polling_wait_past_deadline_does_not_sleep(self):
+        with patch("claude_unity_bridge.cli.time.time", return_value=100.0):
+            with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+                _wait_for_change(None, MIN_SLEEP, deadline=99.0)
 
-            thread = threading.Thread(target=create_response)
+        mock_sleep.assert_called_once_with(0.0)
+
+    def test_watcher_event_skips_sleep(self):
+        watcher = iter([set()])
+        with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+            result_watcher, sleep_time = _wait_for_change(watcher, MIN_SLEEP)
+
+        mock_sleep.assert_not_called()
+        assert result_watcher is watcher
+        assert sleep_time == MIN_SLEEP
+
+    def test_failed_watcher_falls_back_to_polling(self):
+        def broken_watcher():
+            raise OSError("inotify watch limit reached")
+            yield  # pragma: no cover
+
+        with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+            watcher, _ = _wait_for_change(broken_watcher(), MIN_SLEEP)
+
+        assert watcher is None
+        mock_sleep.assert_called_once_with(MIN_SLEEP)
+
+    def test_wait_for_response_with_polling_fallback(self, unity_dir):
+        """wait_for_response still works when watchfiles is unavailable"""
+        command_id = COMMAND_ID
+        response_data = {"id": command_id, "status": "success"}
+        read_after_polls = Mock(side_effect=[FileNotFoundError()] * 3 + [_dumps(response_data)])
+
+        with patch.dict(sys.modules, {"watchfiles": None}):
+            with patch("claude_unity_bridge.cli._read_file", read_after_polls):
+                with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+                    result = wait_for_response(command_id, timeout=2)
+
+        assert result == response_data
+        assert mock_sleep.call_count == 3
+
+    @pytest.mark.slow
+    def test_wait_for_response_with_watcher(self, unity_dir):
+        """wait_for_response wakes on filesystem events when watchfiles is installed"""
+        pytest.importorskip("watchfiles")
+        command_id = COMMAND_ID
+        response_data = {"id": command_id, "status": "success"}
+        written_at = []
+        watchers = []
+
+        def create_response():
+            time.sleep(0.15)
+            response_file = unity_dir / f"response-{command_id}.json"
+            _write_json(response_file, response_data)
+            written_at.append(time.monotonic())
+
+        def recording_watch(response_file):
+            watchers.append(_watch_response_file(response_file))
+            return watchers[-1]
+
+        thread = threading.Thread(target=create_response)
+        with patch("claude_unity_bridge.cli._watch_response_file", recording_watch):
             thread.start()
+            result = wait_for_response(command_id, timeout=5)
+            returned_at = time.monotonic()
+        thread.join()
+
+        assert result == response_data
+        assert watchers and watchers[0] is not None
+        # Woken by the event, not a poll interval; bounded by the watch debounce
+        assert returned_at - written_at[0] < 0.1
+
+    @pytest.mark.slow
+    def test_watcher_rechecks_response_written_before_watch_started(self, unity_dir):
+        """A response that lands before the watch starts is found on the periodic re-check"""
+        pytest.importorskip("watchfiles")
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
+        _write_json(response_file, {"id": command_id, "status": "success"})
+        # Miss once, then fall through to the real read (DEFAULT defers to wraps)
+        first_read_misses = Mock(
+            wraps=_read_file, side_effect=chain([FileNotFoundError()], repeat(DEFAULT))
+        )
 
-            result = wait_for_response(command_id, timeout=2, verbose=True)
-            thread.join()
+        start = time.time()
+        with patch("claude_unity_bridge.cli._read_file", first_read_misses):
+            result = wait_for_response(command_id, timeout=5)
 
-            assert result == response_data
+        assert result["status"] == "success"
+        assert first_read_misses.call_count >= 2
+        assert time.time() - start < MAX_SLEEP
 
-    def test_wait_json_decode_error_recovery(self, tmp_path, capsys):
-        """Test that mid-write JSON errors are retried once"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "b8c9d0e1-f2a3-4567-bcde-678901234567"
-            response_file = tmp_path / f"response-{command_id}.json"
+    def test_ready_response_read_without_sleeping(self, unity_dir):
+        """A response already on disk is returned without any fixed delay"""
+        command_id = COMMAND_ID
+        response_data = {"id": command_id, "status": "success"}
+        _write_json(unity_dir / f"response-{command_id}.json", response_data)
 
-            # Write invalid JSON initially (will be overwritten)
-            response_file.write_text("{ invalid json")
+        with patch("claude_unity_bridge.cli.time.sleep") as mock_sleep:
+            result = wait_for_response(command_id, timeout=1)
 
-            # Track calls to simulate file being written mid-read
-            call_count = [0]
+        assert result == response_data
+        mock_sleep.assert_not_called()
 
-            def mock_read(self):
-                call_count[0] += 1
-                if call_count[0] <= 1:
-                    return "{ invalid"
-                return json.dumps({"id": command_id, "status": "success"})
 
-            with patch.object(Path, "read_text", mock_read):
-                result = wait_for_response(command_id, timeout=2, verbose=True)
-                assert result["status"] == "success"
+class TestPollTuning:
+    """Test the polling fallback's tuning knobs"""
 
-    def test_wait_json_decode_error_persistent(self, tmp_path, capsys):
-        """Test that persistent JSON errors raise an exception"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "c9d0e1f2-a3b4-5678-cdef-789012345678"
-            response_file = tmp_path / f"response-{command_id}.json"
+    def test_custom_backoff_base(self):
+        with patch("claude_unity_bridge.cli.time.sleep"):
+            _, sleep_time = _wait_for_change(None, 0.1, multiplier=2.0)
 
-            # Write invalid JSON that stays invalid
-            response_file.write_text("{ not valid json at all")
+        assert sleep_time == pytest.approx(0.2)
 
-            with pytest.raises(UnityCommandError) as exc_info:
-                wait_for_response(command_id, timeout=2, verbose=True)
+    def test_poll_args_forwarded(self, unity_dir):
+        argv = ["get-status", "--poll-min", "0.005", "--poll-base", "1.1"]
+        with patch("claude_unity_bridge.cli.execute_command", return_value="ok") as mock_execute:
+            assert main(argv) == EXIT_SUCCESS
 
-            assert "Failed to parse response JSON" in str(exc_info.value)
-            captured = capsys.readouterr()
-            assert "Warning: Failed to parse response" in captured.err
+        assert mock_execute.call_args.kwargs["poll_min"] == 0.005
+        assert mock_execute.call_args.kwargs["poll_base"] == 1.1
+
+    def test_poll_args_validated(self):
+        with pytest.raises(SystemExit):
+            main(["get-status", "--poll-base", "0.5"])
+
+    def test_poll_args_hidden_from_help(self, capsys):
+        with pytest.raises(SystemExit):
+            main(["--help"])
+
+        assert "--poll-min" not in capsys.readouterr().out
+
+
+class TestAdaptivePolling:
+    """Test the first poll delay derived from recent round-trip times"""
+
+    def test_default_without_timings(self, unity_dir):
+        assert _initial_sleep_time() == MIN_SLEEP
+
+    def test_corrupt_timings_fall_back_to_default(self, unity_dir):
+        (unity_dir / ".timings").write_text("not json")
+        assert _initial_sleep_time() == MIN_SLEEP
+
+    def test_fast_commands_poll_sooner(self, unity_dir):
+        _write_json(unity_dir / ".timings", [60, 80, 100])
+        assert _initial_sleep_time() == pytest.approx(0.04)
+
+    def test_delay_has_a_floor(self, unity_dir):
+        _write_json(unity_dir / ".timings", [1, 2, 3])
+        assert _initial_sleep_time() == MIN_SLEEP
+        assert _initial_sleep_time(poll_min=0.005) == pytest.approx(0.005)
+
+    def test_slow_commands_capped(self, unity_dir):
+        _write_json(unity_dir / ".timings", [5000, 12000])
+        assert _initial_sleep_time() == MAX_INITIAL_SLEEP
+
+    def test_record_keeps_recent_history(self, unity_dir):
+        for elapsed in range(TIMINGS_HISTORY + 3):
+            _record_round_trip(float(elapsed))
+
+        timings = json.loads((unity_dir / ".timings").read_text())
+        assert timings == [float(e) for e in range(3, TIMINGS_HISTORY + 3)]
+
+    def test_record_ignores_write_failures(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(cli, "UNITY_DIR", tmp_path / "missing")
+        _record_round_trip(10.0)  # Should not raise
 
 
 class TestWaitForRunningStatus:
     """Test that wait_for_response polls through 'running' status"""
 
-    def test_polls_until_complete(self, tmp_path):
+    def test_polls_until_complete(self, unity_dir, virtual_clock):
         """wait_for_response should keep polling when status is 'running'"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
-            response_file = tmp_path / f"response-{command_id}.json"
-
-            # Write initial "running" response
-            running_response = {
-                "id": command_id,
-                "status": "running",
-                "action": "run-tests",
-                "progress": {"current": 0, "total": 10},
-            }
-            response_file.write_text(json.dumps(running_response))
-
-            # After a delay, update to "success"
-            def update_response():
-                time.sleep(0.5)
-                success_response = {
-                    "id": command_id,
-                    "status": "success",
-                    "action": "run-tests",
-                    "duration_ms": 1000,
-                    "result": {"passed": 10, "failed": 0, "skipped": 0, "failures": []},
-                }
-                response_file.write_text(json.dumps(success_response))
-
-            import threading
-
-            thread = threading.Thread(target=update_response)
-            thread.start()
+        command_id = COMMAND_ID
 
+        running_response = {
+            "id": command_id,
+            "status": "running",
+            "action": "run-tests",
+            "progress": {"current": 0, "total": 10},
+        }
+        success_response = {
+            "id": command_id,
+            "status": "success",
+            "action": "run-tests",
+            "duration_ms": 1000,
+            "result": {"passed": 10, "failed": 0, "skipped": 0, "failures": []},
+        }
+        # Unity rewrites the file from "running" to the final status
+        reads = Mock(side_effect=[_dumps(running_response), _dumps(success_response)])
+
+        with patch("claude_unity_bridge.cli._read_file", reads):
             result = wait_for_response(command_id, timeout=5)
-            thread.join()
 
-            assert result["status"] == "success"
-            assert result["result"]["passed"] == 10
+        assert result["status"] == "success"
+        assert result["result"]["passed"] == 10
 
-    def test_timeout_while_running(self, tmp_path):
+    def test_timeout_while_running(self, unity_dir, virtual_clock):
         """wait_for_response should timeout even if status stays 'running'"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "b2c3d4e5-f6a7-8901-bcde-f12345678901"
-            response_file = tmp_path / f"response-{command_id}.json"
-
-            # Write "running" response that never completes
-            running_response = {
-                "id": command_id,
-                "status": "running",
-                "action": "run-tests",
-                "progress": {"current": 0, "total": 10},
-            }
-            response_file.write_text(json.dumps(running_response))
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
+
+        # Write "running" response that never completes
+        running_response = {
+            "id": command_id,
+            "status": "running",
+            "action": "run-tests",
+            "progress": {"current": 0, "total": 10},
+        }
+        _write_json(response_file, running_response)
 
-            with pytest.raises(CommandTimeoutError):
-                wait_for_response(command_id, timeout=1)
+        with pytest.raises(CommandTimeoutError):
+            wait_for_response(command_id, timeout=1)
 
-    def test_verbose_progress_output(self, tmp_path, capsys):
+    def test_verbose_progress_output(self, unity_dir, capsys, virtual_clock):
         """wait_for_response should print progress when verbose and status is 'running'"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "c3d4e5f6-a7b8-9012-cdef-123456789012"
-            response_file = tmp_path / f"response-{command_id}.json"
-
-            # Write initial "running" response with progress
-            running_response = {
-                "id": command_id,
-                "status": "running",
-                "action": "run-tests",
-                "progress": {"current": 5, "total": 10, "currentTest": "TestFoo"},
-            }
-            response_file.write_text(json.dumps(running_response))
-
-            # After a delay, update to "success"
-            def update_response():
-                time.sleep(0.5)
-                success_response = {
-                    "id": command_id,
-                    "status": "success",
-                    "action": "run-tests",
-                    "duration_ms": 1000,
-                    "result": {"passed": 10, "failed": 0, "skipped": 0, "failures": []},
-                }
-                response_file.write_text(json.dumps(success_response))
-
-            import threading
-
-            thread = threading.Thread(target=update_response)
-            thread.start()
+        command_id = COMMAND_ID
+
+        running_response = {
+            "id": command_id,
+            "status": "running",
+            "action": "run-tests",
+            "progress": {"current": 5, "total": 10, "currentTest": "TestFoo"},
+        }
+        success_response = {
+            "id": command_id,
+            "status": "success",
+            "action": "run-tests",
+            "duration_ms": 1000,
+            "result": {"passed": 10, "failed": 0, "skipped": 0, "failures": []},
+        }
+        # Unity rewrites the file from "running" to the final status
+        reads = Mock(side_effect=[_dumps(running_response), _dumps(success_response)])
 
+        with patch("claude_unity_bridge.cli._read_file", reads):
             result = wait_for_response(command_id, timeout=5, verbose=True)
-            thread.join()
 
-            assert result["status"] == "success"
-            captured = capsys.readouterr()
-            assert "Tests in progress: 5/10 TestFoo" in captured.err
+        assert result["status"] == "success"
+        _assert_in_stderr(capsys, "Tests in progress: 5/10 TestFoo")
 
-    def test_verbose_no_progress_info(self, tmp_path, capsys):
+    def test_verbose_no_progress_info(self, unity_dir, capsys, virtual_clock):
         """Verbose output should say 'Command running...' when no progress info"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "d4e5f6a7-b8c9-0123-defa-234567890123"
-            response_file = tmp_path / f"response-{command_id}.json"
-
-            # Write "running" response without progress total
-            running_response = {
-                "id": command_id,
-                "status": "running",
-                "action": "compile",
-            }
-            response_file.write_text(json.dumps(running_response))
-
-            # After a delay, update to "success"
-            def update_response():
-                time.sleep(0.5)
-                success_response = {
-                    "id": command_id,
-                    "status": "success",
-                    "action": "compile",
-                    "duration_ms": 500,
-                }
-                response_file.write_text(json.dumps(success_response))
-
-            import threading
-
-            thread = threading.Thread(target=update_response)
-            thread.start()
+        command_id = COMMAND_ID
 
+        # No progress total in the "running" response
+        running_response = {
+            "id": command_id,
+            "status": "running",
+            "action": "compile",
+        }
+        success_response = {
+            "id": command_id,
+            "status": "success",
+            "action": "compile",
+            "duration_ms": 500,
+        }
+        # Unity rewrites the file from "running" to the final status
+        reads = Mock(side_effect=[_dumps(running_response), _dumps(success_response)])
+
+        with patch("claude_unity_bridge.cli._read_file", reads):
             result = wait_for_response(command_id, timeout=5, verbose=True)
-            thread.join()
 
-            assert result["status"] == "success"
-            captured = capsys.readouterr()
-            assert "Command running..." in captured.err
+        assert result["status"] == "success"
+        _assert_in_stderr(capsys, "Command running...")
 
-    def test_returns_failure_not_running(self, tmp_path):
+    def test_returns_failure_not_running(self, unity_dir):
         """wait_for_response should return immediately for non-running statuses"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "e5f6a7b8-c9d0-1234-efab-345678901234"
-            response_file = tmp_path / f"response-{command_id}.json"
-
-            # Write a "failure" response (should return immediately)
-            failure_response = {
-                "id": command_id,
-                "status": "failure",
-                "action": "run-tests",
-                "duration_ms": 1000,
-                "result": {"passed": 8, "failed": 2, "skipped": 0, "failures": []},
-            }
-            response_file.write_text(json.dumps(failure_response))
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
 
-            result = wait_for_response(command_id, timeout=5)
-            assert result["status"] == "failure"
-            assert result["result"]["failed"] == 2
+        # Write a "failure" response (should return immediately)
+        failure_response = {
+            "id": command_id,
+            "status": "failure",
+            "action": "run-tests",
+            "duration_ms": 1000,
+            "result": {"passed": 8, "failed": 2, "skipped": 0, "failures": []},
+        }
+        _write_json(response_file, failure_response)
+
+        result = wait_for_response(command_id, timeout=5)
+        assert result["status"] == "failure"
+        assert result["result"]["failed"] == 2
 
 
 class TestExecuteCommand:
     """Test execute_command function"""
 
-    def test_execute_command_success(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Write command file manually
-            import uuid
-
-            command_id = str(uuid.uuid4())
-
-            # Mock write_command to return our known ID and create the response
-            def mock_write(action, params):
-                # Create the command file
-                tmp_path.mkdir(parents=True, exist_ok=True)
-                command_file = tmp_path / "command.json"
-                command_file.write_text(
-                    json.dumps({"id": command_id, "action": action, "params": params})
-                )
-                # Immediately create the response (new editorStatus format)
-                response_file = tmp_path / f"response-{command_id}.json"
-                response_file.write_text(
-                    json.dumps(
-                        {
-                            "id": command_id,
-                            "status": "success",
-                            "action": "get-status",
-                            "duration_ms": 10,
-                            "editorStatus": {
-                                "isCompiling": False,
-                                "isUpdating": False,
-                                "isPlaying": False,
-                                "isPaused": False,
-                            },
-                        }
-                    )
-                )
-                return command_id
-
-            with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                result = execute_command("get-status", {}, timeout=5)
-                assert "Unity Editor Status" in result
-
-    def test_execute_command_always_cleans_up(self, tmp_path):
+    def test_execute_command_success(self, unity_dir):
+        command_id = COMMAND_ID
+        mock_write = _responding_write(unity_dir, command_id, SUCCESS_STATUS_JSON)
+
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            result = execute_command("get-status", {}, timeout=5)
+            assert "Unity Editor Status" in result
+
+        # Successful status results are kept briefly for health-check
+        cached = json.loads((unity_dir / ".last-status.json").read_text())
+        assert cached["result"] == result
+
+    def test_execute_command_writes_to_output(self, unity_dir):
+        command_id = COMMAND_ID
+        mock_write = _responding_write(unity_dir, command_id, SUCCESS_COMPILE_JSON)
+
+        out = io.StringIO()
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            result = execute_command("compile", {}, timeout=5, output=out)
+
+        assert result == ""
+        assert out.getvalue() == "✓ Compilation Successful\nDuration: 0.10s\n"
+        assert not (unity_dir / f"response-{command_id}.json").exists()
+
+    def test_execute_command_json_output(self, unity_dir):
+        """--json passes Unity's response through without formatting"""
+        command_id = COMMAND_ID
+        raw = _dumps({"id": command_id, "status": "success", "duration_ms": 100}).decode()
+
+        mock_write = _responding_write(unity_dir, command_id, raw.encode() + b"\n")
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            assert execute_command("compile", {}, timeout=5, json_output=True) == raw
+
+            out = io.StringIO()
+            result = execute_command("compile", {}, timeout=5, output=out, json_output=True)
+
+        assert result == ""
+        assert out.getvalue() == raw + "\n"
+        assert not (unity_dir / ".last-status.json").exists()
+
+    def test_execute_command_json_output_caches_status(self, unity_dir):
+        """get-status --json still refreshes the health-check cache"""
+        command_id = COMMAND_ID
+        mock_write = _responding_write(unity_dir, command_id, SUCCESS_STATUS_JSON)
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            execute_command("get-status", {}, timeout=5, json_output=True)
+
+        assert cli._load_cached_status() is not None
+
+    def test_execute_command_always_cleans_up(self, unity_dir):
         """execute_command always runs cleanup, even without cleanup flag"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Create an old response file
-            tmp_path.mkdir(parents=True, exist_ok=True)
-            old_file = tmp_path / "response-old-exec.json"
-            old_file.write_text('{"id": "old"}')
-            import os
-
-            old_time = time.time() - 7200
-            os.utime(old_file, (old_time, old_time))
-
-            import uuid
-
-            command_id = str(uuid.uuid4())
-
-            def mock_write(action, params):
-                response_file = tmp_path / f"response-{command_id}.json"
-                response_file.write_text(
-                    json.dumps(
-                        {
-                            "id": command_id,
-                            "status": "success",
-                            "action": "compile",
-                            "duration_ms": 100,
-                        }
-                    )
-                )
-                return command_id
-
-            with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                # Note: cleanup flag NOT passed — cleanup should still run
-                result = execute_command("compile", {}, timeout=5)
-                assert "Compilation Successful" in result
-                # Old file should be cleaned up even without cleanup=True
-                assert not old_file.exists()
-
-    def test_execute_command_verbose(self, tmp_path, capsys):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import uuid
-
-            command_id = str(uuid.uuid4())
-
-            def mock_write(action, params):
-                tmp_path.mkdir(parents=True, exist_ok=True)
-                response_file = tmp_path / f"response-{command_id}.json"
-                response_file.write_text(
-                    json.dumps(
-                        {
-                            "id": command_id,
-                            "status": "success",
-                            "action": "refresh",
-                            "duration_ms": 50,
-                        }
-                    )
-                )
-                return command_id
-
-            with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                result = execute_command("refresh", {}, timeout=5, verbose=True)
-                assert "Asset Database Refreshed" in result
-
-                captured = capsys.readouterr()
-                assert "Writing command: refresh" in captured.err
-                assert f"Command ID: {command_id}" in captured.err
-                assert "Waiting for response" in captured.err
+        (old_file,) = _place_aged_files(
+            unity_dir, [("response-old-exec.json", '{"id": "old"}', 7200)]
+        )
+
+        command_id = COMMAND_ID
+        mock_write = _responding_write(unity_dir, command_id, SUCCESS_COMPILE_JSON)
+
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            # Note: cleanup flag NOT passed — cleanup should still run
+            result = execute_command("compile", {}, timeout=5)
+            assert "Compilation Successful" in result
+            # Old file should be cleaned up even without cleanup=True
+            assert not old_file.exists()
+
+    def test_execute_command_verbose(self, unity_dir, capsys):
+        command_id = COMMAND_ID
+        mock_write = _responding_write(unity_dir, command_id, SUCCESS_REFRESH_JSON)
+
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            result = execute_command("refresh", {}, timeout=5, verbose=True)
+            assert "Asset Database Refreshed" in result
+
+            _assert_in_stderr(
+                capsys,
+                "Writing command: refresh",
+                f"Command ID: {command_id}",
+                "Waiting for response",
+            )
 
 
 class TestHealthCheck:
     """Test health-check command"""
 
-    def test_health_check_no_directory(self, tmp_path, capsys):
+    def test_health_check_no_directory(self, tmp_path, capsys, monkeypatch):
         """Health check fails when Unity directory doesn't exist"""
         nonexistent_dir = tmp_path / "does-not-exist"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", nonexistent_dir):
-            result = execute_health_check(timeout=5, verbose=False)
-            assert result == EXIT_ERROR
+        monkeypatch.setattr(cli, "UNITY_DIR", nonexistent_dir)
+        result = execute_health_check(timeout=5, verbose=False)
+        assert result == EXIT_ERROR
 
-            captured = capsys.readouterr()
-            assert "Unity Bridge not detected" in captured.out
-            assert "Directory not found" in captured.out
+        captured = capsys.readouterr()
+        assert "Unity Bridge not detected" in captured.out
+        assert "Directory not found" in captured.out
 
-    def test_health_check_success(self, tmp_path, capsys):
+    def test_health_check_success(self, unity_dir, capsys):
         """Health check succeeds when Unity responds"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            tmp_path.mkdir(parents=True, exist_ok=True)
 
-            # Mock execute_command to return success
-            def mock_execute(action, params, timeout, verbose):
-                return "Unity Editor Status:\n  - Compilation: ✓ Ready"
+        # Mock execute_command to return success
+        def mock_execute(action, params, timeout, verbose):
+            return "Unity Editor Status:\n  - Compilation: ✓ Ready"
 
-            with patch("claude_unity_bridge.cli.execute_command", side_effect=mock_execute):
-                result = execute_health_check(timeout=5, verbose=False)
-                assert result == EXIT_SUCCESS
+        with patch("claude_unity_bridge.cli.execute_command", side_effect=mock_execute):
+            result = execute_health_check(timeout=5, verbose=False)
+            assert result == EXIT_SUCCESS
 
-                captured = capsys.readouterr()
-                assert "Bridge directory exists" in captured.out
-                assert "Unity Editor is responding" in captured.out
+            captured = capsys.readouterr()
+            assert "Bridge directory exists" in captured.out
+            assert "Unity Editor is responding" in captured.out
 
-    def test_health_check_unity_not_responding(self, tmp_path, capsys):
+    def test_health_check_unity_not_responding(self, unity_dir, capsys):
         """Health check fails when Unity doesn't respond"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            tmp_path.mkdir(parents=True, exist_ok=True)
-
-            # Mock execute_command to raise UnityNotRunningError
-            with patch(
-                "claude_unity_bridge.cli.execute_command",
-                side_effect=UnityNotRunningError("Unity not running"),
-            ):
-                result = execute_health_check(timeout=5, verbose=False)
-                assert result == EXIT_ERROR
+        # Mock execute_command to raise UnityNotRunningError
+        with patch(
+            "claude_unity_bridge.cli.execute_command",
+            side_effect=UnityNotRunningError("Unity not running"),
+        ):
+            result = execute_health_check(timeout=5, verbose=False)
+            assert result == EXIT_ERROR
 
-                captured = capsys.readouterr()
-                assert "Unity Editor not responding" in captured.out
+            captured = capsys.readouterr()
+            assert "Unity Editor not responding" in captured.out
 
-    def test_health_check_timeout(self, tmp_path, capsys):
+    def test_health_check_timeout(self, unity_dir, capsys):
         """Health check returns timeout when Unity times out"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            tmp_path.mkdir(parents=True, exist_ok=True)
+        # Mock execute_command to raise CommandTimeoutError
+        with patch(
+            "claude_unity_bridge.cli.execute_command",
+            side_effect=CommandTimeoutError("Timeout"),
+        ):
+            result = execute_health_check(timeout=5, verbose=False)
+            assert result == EXIT_TIMEOUT
+
+            captured = capsys.readouterr()
+            assert "Unity Editor timed out" in captured.out
+
+    def test_health_check_uses_recent_status(self, unity_dir, capsys):
+        """A fresh get-status result answers the health check without a round trip"""
+        _write_json(
+            unity_dir / ".last-status.json", {"ts": time.time(), "result": "Unity Editor Status:"}
+        )
+
+        with patch("claude_unity_bridge.cli.execute_command") as mock_execute:
+            result = execute_health_check(timeout=5, verbose=True)
+
+        assert result == EXIT_SUCCESS
+        mock_execute.assert_not_called()
+        captured = capsys.readouterr()
+        assert "Unity Editor is responding (cached)" in captured.out
+        assert "Unity Editor Status:" in captured.out
 
-            # Mock execute_command to raise CommandTimeoutError
+    def test_health_check_ignores_stale_or_disabled_cache(self, unity_dir):
+        cache = unity_dir / ".last-status.json"
+        for ts, use_cache in [(time.time() - 10, True), (time.time(), False)]:
+            _write_json(cache, {"ts": ts, "result": "Unity Editor Status:"})
             with patch(
-                "claude_unity_bridge.cli.execute_command",
-                side_effect=CommandTimeoutError("Timeout"),
-            ):
-                result = execute_health_check(timeout=5, verbose=False)
-                assert result == EXIT_TIMEOUT
+                "claude_unity_bridge.cli.execute_command", return_value="ok"
+            ) as mock_execute:
+                result = execute_health_check(timeout=5, verbose=False, use_cache=use_cache)
 
-                captured = capsys.readouterr()
-                assert "Unity Editor timed out" in captured.out
+            assert result == EXIT_SUCCESS
+            mock_execute.assert_called_once()
 
 
 class TestMainFunction:
     """Test main() CLI function"""
 
-    def test_main_help(self, capsys):
-        with patch("sys.argv", ["unity-bridge", "--help"]):
-            with pytest.raises(SystemExit) as exc_info:
-                main()
-            assert exc_info.value.code == 0
-
-    def test_main_run_tests(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = ["unity-bridge", "run-tests", "--mode", "EditMode", "--timeout", "1"]
-            with patch("sys.argv", argv):
-                # Create response immediately
-                def mock_write(action, params):
-                    command_id = "d0e1f2a3-b4c5-6789-defa-890123456789"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "run-tests",
-                                "duration_ms": 100,
-                                "result": {
-                                    "passed": 5,
-                                    "failed": 0,
-                                    "skipped": 0,
-                                    "failures": [],
-                                },
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_get_console_logs(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = [
-                "unity-bridge",
-                "get-console-logs",
-                "--limit",
-                "10",
-                "--filter",
-                "Error",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    assert params.get("limit") == "10"
-                    assert params.get("filter") == "Error"
-                    command_id = "e1f2a3b4-c5d6-7890-efab-901234567890"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "get-console-logs",
-                                "consoleLogs": [],
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_health_check(self, tmp_path, capsys):
+    def test_main_help(self):
+        with pytest.raises(SystemExit) as exc_info:
+            main(["--help"])
+        assert exc_info.value.code == 0
+
+    def test_main_run_tests(self, unity_dir):
+        argv = ["run-tests", "--mode", "EditMode", "--timeout", "1"]
+        mock_write = _responding_write(unity_dir, COMMAND_ID, SUCCESS_RUN_TESTS_JSON)
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+    def test_main_get_console_logs(self, unity_dir):
+        argv = [
+            "get-console-logs",
+            "--limit",
+            "10",
+            "--filter",
+            "Error",
+            "--timeout",
+            "1",
+        ]
+        mock_write = _responding_write(unity_dir, COMMAND_ID, SUCCESS_CONSOLE_LOGS_JSON)
+        with patch(
+            "claude_unity_bridge.cli.write_command", side_effect=mock_write
+        ) as mock_write_command:
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+        params = mock_write_command.call_args.args[1]
+        assert params.get("limit") == "10"
+        assert params.get("filter") == "Error"
+
+    def test_main_health_check(self, unity_dir):
         """Test health-check via main()"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            tmp_path.mkdir(parents=True, exist_ok=True)
-
-            argv = ["unity-bridge", "health-check", "--timeout", "5"]
-            with patch("sys.argv", argv):
-
-                def mock_execute(action, params, timeout, verbose):
-                    return "Unity Editor Status:\n  - Compilation: ✓ Ready"
-
-                with patch("claude_unity_bridge.cli.execute_command", side_effect=mock_execute):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_play(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = ["unity-bridge", "play", "--timeout", "1"]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    command_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "play",
-                                "duration_ms": 10,
-                                "editorStatus": {
-                                    "isCompiling": False,
-                                    "isUpdating": False,
-                                    "isPlaying": True,
-                                    "isPaused": False,
-                                },
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_pause(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = ["unity-bridge", "pause", "--timeout", "1"]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    command_id = "b2c3d4e5-f6a7-8901-bcde-f12345678901"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "pause",
-                                "duration_ms": 10,
-                                "editorStatus": {
-                                    "isCompiling": False,
-                                    "isUpdating": False,
-                                    "isPlaying": True,
-                                    "isPaused": True,
-                                },
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_step(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = ["unity-bridge", "step", "--timeout", "1"]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    command_id = "c3d4e5f6-a7b8-9012-cdef-123456789012"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "step",
-                                "duration_ms": 10,
-                                "editorStatus": {
-                                    "isCompiling": False,
-                                    "isUpdating": False,
-                                    "isPlaying": True,
-                                    "isPaused": True,
-                                },
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_timeout_error(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with patch("sys.argv", ["unity-bridge", "compile", "--timeout", "1"]):
-                # Don't create response - will timeout
-                exit_code = main()
-                assert exit_code == EXIT_TIMEOUT
-
-    def test_main_unity_not_running(self, tmp_path):
+        argv = ["health-check", "--timeout", "5"]
+
+        def mock_execute(action, params, timeout, verbose):
+            return "Unity Editor Status:\n  - Compilation: ✓ Ready"
+
+        with patch("claude_unity_bridge.cli.execute_command", side_effect=mock_execute):
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+    def test_main_play(self, unity_dir):
+        argv = ["play", "--timeout", "1"]
+        response = _dumps(_status_response(PLACEHOLDER_ID, "play", isPlaying=True))
+        mock_write = _responding_write(unity_dir, COMMAND_ID, response)
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+    def test_main_pause(self, unity_dir):
+        argv = ["pause", "--timeout", "1"]
+        response = _dumps(_status_response(PLACEHOLDER_ID, "pause", isPlaying=True, isPaused=True))
+        mock_write = _responding_write(unity_dir, COMMAND_ID, response)
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+    def test_main_step(self, unity_dir):
+        argv = ["step", "--timeout", "1"]
+        response = _dumps(_status_response(PLACEHOLDER_ID, "step", isPlaying=True, isPaused=True))
+        mock_write = _responding_write(unity_dir, COMMAND_ID, response)
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+    def test_main_timeout_error(self, unity_dir, virtual_clock):
+        # Don't create response - will timeout
+        exit_code = main(["compile", "--timeout", "1"])
+        assert exit_code == EXIT_TIMEOUT
+
+    def test_main_unity_not_running(self, tmp_path, virtual_clock, monkeypatch):
         nonexistent_dir = tmp_path / "nonexistent"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", nonexistent_dir):
-            with patch("sys.argv", ["unity-bridge", "get-status", "--timeout", "1"]):
-                # Mock write_command to return an ID without creating the directory
-                # This simulates the case where the command file can't be written
-                # because Unity never created the directory structure
-                with patch(
-                    "claude_unity_bridge.cli.write_command",
-                    return_value="f2a3b4c5-d6e7-8901-fabc-012345678901",
-                ):
-                    exit_code = main()
-                    assert exit_code == EXIT_ERROR
+        monkeypatch.setattr(cli, "UNITY_DIR", nonexistent_dir)
+        # Mock write_command to return an ID without creating the directory
+        # This simulates the case where the command file can't be written
+        # because Unity never created the directory structure
+        with patch(
+            "claude_unity_bridge.cli.write_command",
+            return_value=COMMAND_ID,
+        ):
+            exit_code = main(["get-status", "--timeout", "1"])
+            assert exit_code == EXIT_ERROR
 
-    def test_main_command_error(self, tmp_path):
+    def test_main_command_error(self, tmp_path, monkeypatch):
         # Create a file where the directory should be
         blocking_file = tmp_path / "blocking"
         blocking_file.write_text("blocking")
         unity_dir = blocking_file / "unity"
 
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            with patch("sys.argv", ["unity-bridge", "compile", "--timeout", "1"]):
-                exit_code = main()
-                assert exit_code == EXIT_ERROR
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        exit_code = main(["compile", "--timeout", "1"])
+        assert exit_code == EXIT_ERROR
 
-    def test_main_keyboard_interrupt(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with patch("sys.argv", ["unity-bridge", "compile", "--timeout", "1"]):
-                with patch(
-                    "claude_unity_bridge.cli.execute_command",
-                    side_effect=KeyboardInterrupt,
-                ):
-                    exit_code = main()
-                    assert exit_code == EXIT_ERROR
+    def test_main_keyboard_interrupt(self, unity_dir):
+        with patch(
+            "claude_unity_bridge.cli.execute_command",
+            side_effect=KeyboardInterrupt,
+        ):
+            exit_code = main(["compile", "--timeout", "1"])
+            assert exit_code == EXIT_ERROR
 
-    def test_main_unexpected_error(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with patch("sys.argv", ["unity-bridge", "compile", "--timeout", "1"]):
-                with patch(
-                    "claude_unity_bridge.cli.execute_command",
-                    side_effect=RuntimeError("Unexpected"),
-                ):
-                    exit_code = main()
-                    assert exit_code == EXIT_ERROR
+    def test_main_unexpected_error(self, unity_dir):
+        with patch(
+            "claude_unity_bridge.cli.execute_command",
+            side_effect=RuntimeError("Unexpected"),
+        ):
+            exit_code = main(["compile", "--timeout", "1"])
+            assert exit_code == EXIT_ERROR
 
-    def test_main_verbose_unexpected_error(self, tmp_path, capsys):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with patch("sys.argv", ["unity-bridge", "compile", "--timeout", "1", "--verbose"]):
-                with patch(
-                    "claude_unity_bridge.cli.execute_command",
-                    side_effect=RuntimeError("Unexpected"),
-                ):
-                    exit_code = main()
-                    assert exit_code == EXIT_ERROR
-                    captured = capsys.readouterr()
-                    assert "Unexpected error" in captured.err
+    def test_main_verbose_unexpected_error(self, unity_dir, capsys):
+        with patch(
+            "claude_unity_bridge.cli.execute_command",
+            side_effect=RuntimeError("Unexpected"),
+        ):
+            exit_code = main(["compile", "--timeout", "1", "--verbose"])
+            assert exit_code == EXIT_ERROR
+            _assert_in_stderr(capsys, "Unexpected error")
 
 
 class TestArgumentValidation:
     """Test command-line argument validation"""
 
-    def test_timeout_zero_rejected(self, tmp_path, capsys):
+    def test_timeout_zero_rejected(self, unity_dir, capsys):
         """--timeout 0 should fail validation"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with patch("sys.argv", ["unity-bridge", "get-status", "--timeout", "0"]):
-                with pytest.raises(SystemExit) as exc_info:
-                    main()
-                assert exc_info.value.code == 2  # argparse error exit code
+        with pytest.raises(SystemExit) as exc_info:
+            main(["get-status", "--timeout", "0"])
+        assert exc_info.value.code == 2  # argparse error exit code
 
-                captured = capsys.readouterr()
-                assert "must be a positive integer" in captured.err
+        _assert_in_stderr(capsys, "must be a positive integer")
 
-    def test_timeout_negative_rejected(self, tmp_path, capsys):
+    def test_timeout_negative_rejected(self, unity_dir, capsys):
         """--timeout -5 should fail validation"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with patch("sys.argv", ["unity-bridge", "compile", "--timeout", "-5"]):
-                with pytest.raises(SystemExit) as exc_info:
-                    main()
-                assert exc_info.value.code == 2
+        with pytest.raises(SystemExit) as exc_info:
+            main(["compile", "--timeout", "-5"])
+        assert exc_info.value.code == 2
 
-                captured = capsys.readouterr()
-                assert "must be a positive integer" in captured.err
+        _assert_in_stderr(capsys, "must be a positive integer")
 
-    def test_limit_zero_rejected(self, tmp_path, capsys):
+    def test_limit_zero_rejected(self, unity_dir, capsys):
         """--limit 0 should fail validation"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = [
-                "unity-bridge",
-                "get-console-logs",
-                "--limit",
-                "0",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-                with pytest.raises(SystemExit) as exc_info:
-                    main()
-                assert exc_info.value.code == 2
+        argv = [
+            "get-console-logs",
+            "--limit",
+            "0",
+            "--timeout",
+            "1",
+        ]
+        with pytest.raises(SystemExit) as exc_info:
+            main(argv)
+        assert exc_info.value.code == 2
 
-                captured = capsys.readouterr()
-                expected_msg = f"--limit must be between {MIN_LIMIT} and {MAX_LIMIT}"
-                assert expected_msg in captured.err
+        captured = capsys.readouterr()
+        expected_msg = f"--limit must be between {MIN_LIMIT} and {MAX_LIMIT}"
+        assert expected_msg in captured.err
 
-    def test_limit_negative_rejected(self, tmp_path, capsys):
+    def test_limit_negative_rejected(self, unity_dir, capsys):
         """--limit -1 should fail validation"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = [
-                "unity-bridge",
-                "get-console-logs",
-                "--limit",
-                "-1",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-                with pytest.raises(SystemExit) as exc_info:
-                    main()
-                assert exc_info.value.code == 2
-
-                captured = capsys.readouterr()
-                assert "--limit must be between" in captured.err
-
-    def test_limit_too_large_rejected(self, tmp_path, capsys):
+        argv = [
+            "get-console-logs",
+            "--limit",
+            "-1",
+            "--timeout",
+            "1",
+        ]
+        with pytest.raises(SystemExit) as exc_info:
+            main(argv)
+        assert exc_info.value.code == 2
+
+        _assert_in_stderr(capsys, "--limit must be between")
+
+    def test_limit_too_large_rejected(self, unity_dir, capsys):
         """--limit 1001 should fail validation (exceeds MAX_LIMIT)"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = [
-                "unity-bridge",
-                "get-console-logs",
-                "--limit",
-                "1001",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-                with pytest.raises(SystemExit) as exc_info:
-                    main()
-                assert exc_info.value.code == 2
+        argv = [
+            "get-console-logs",
+            "--limit",
+            "1001",
+            "--timeout",
+            "1",
+        ]
+        with pytest.raises(SystemExit) as exc_info:
+            main(argv)
+        assert exc_info.value.code == 2
 
-                captured = capsys.readouterr()
-                expected_msg = f"--limit must be between {MIN_LIMIT} and {MAX_LIMIT}"
-                assert expected_msg in captured.err
+        captured = capsys.readouterr()
+        expected_msg = f"--limit must be between {MIN_LIMIT} and {MAX_LIMIT}"
+        assert expected_msg in captured.err
 
-    def test_limit_valid_boundary(self, tmp_path):
+    def test_limit_valid_boundary(self, unity_dir):
         """--limit 1 and --limit 1000 should be accepted"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Test lower boundary
-            argv = [
-                "unity-bridge",
-                "get-console-logs",
-                "--limit",
-                "1",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    assert params.get("limit") == "1"  # String for C# compatibility
-                    command_id = "a3b4c5d6-e7f8-9012-abcd-123456789abc"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "get-console-logs",
-                                "consoleLogs": [],
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-            # Test upper boundary
-            argv = [
-                "unity-bridge",
-                "get-console-logs",
-                "--limit",
-                "1000",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-
-                def mock_write_1000(action, params):
-                    assert params.get("limit") == "1000"  # String for C# compatibility
-                    command_id = "b4c5d6e7-f8a9-0123-bcde-234567890bcd"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "get-console-logs",
-                                "consoleLogs": [],
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write_1000):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
+        mock_write = _responding_write(unity_dir, COMMAND_ID, SUCCESS_CONSOLE_LOGS_JSON)
+        for limit in ("1", "1000"):
+            argv = ["get-console-logs", "--limit", limit, "--timeout", "1"]
+            with patch(
+                "claude_unity_bridge.cli.write_command", side_effect=mock_write
+            ) as mock_write_command:
+                exit_code = main(argv)
+                assert exit_code == EXIT_SUCCESS
+
+            # String for C# compatibility
+            assert mock_write_command.call_args.args[1].get("limit") == limit
 
 
 class TestSecurityValidation:
     """Test security-related validations"""
 
-    def test_symlink_detection(self, tmp_path):
+    @requires_symlinks
+    def test_symlink_detection(self, tmp_path, monkeypatch):
         """Symlinked .unity-bridge directory should raise security error"""
         # Create a target directory for the symlink
         target_dir = tmp_path / "real_dir"
@@ -1711,112 +1319,139 @@ class TestSecurityValidation:
 
         # Try to create a symlink for the .unity-bridge directory
         symlink_path = tmp_path / ".unity-bridge"
-        try:
-            symlink_path.symlink_to(target_dir)
-        except OSError:
-            # Can't create symlinks (Windows without Developer Mode)
-            # Skip this test as it requires symlink support
-            pytest.skip("Symlink creation not supported (requires Developer Mode on Windows)")
-
-        with patch("claude_unity_bridge.cli.UNITY_DIR", symlink_path):
-            with pytest.raises(UnityCommandError) as exc_info:
-                write_command("test", {})
+        symlink_path.symlink_to(target_dir)
 
-            assert "symlink" in str(exc_info.value).lower()
-            assert "security" in str(exc_info.value).lower()
+        monkeypatch.setattr(cli, "UNITY_DIR", symlink_path)
+        with pytest.raises(UnityCommandError, match=r"(?i)security.*symlink"):
+            write_command("test", {})
 
-    def test_normal_directory_allowed(self, tmp_path):
+    def test_normal_directory_allowed(self, tmp_path, monkeypatch):
         """Normal (non-symlink) directory should work fine"""
         unity_dir = tmp_path / ".unity-bridge"
         # Don't create it - write_command should create it
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            # Also patch cwd for gitignore check
-            with patch("pathlib.Path.cwd", return_value=tmp_path):
-                command_id = write_command("test-action", {"param": "value"})
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        # Run from tmp_path so the gitignore check looks there
+        monkeypatch.chdir(tmp_path)
+        command_id = write_command("test-action", {"param": "value"})
 
-            # Should succeed
-            assert len(command_id) == 36
-            assert unity_dir.exists()
-            assert not unity_dir.is_symlink()
+        # Should succeed
+        assert len(command_id) == 36
+        assert unity_dir.exists()
+        assert not unity_dir.is_symlink()
 
 
 class TestGitignoreNotification:
     """Test gitignore notification feature"""
 
-    def test_no_notification_when_gitignore_contains_unity_bridge(self, tmp_path, capsys):
+    def test_no_notification_when_gitignore_contains_unity_bridge(self, tmp_path, monkeypatch):
         """No notification when .unity-bridge is already in .gitignore"""
         gitignore = tmp_path / ".gitignore"
         gitignore.write_text(".unity-bridge/\n")
 
-        with patch("pathlib.Path.cwd", return_value=tmp_path):
-            check_gitignore_and_notify()
+        stderr = io.StringIO()
+        monkeypatch.chdir(tmp_path)
+        with redirect_stderr(stderr):
+            assert check_gitignore_and_notify() is True
 
-        captured = capsys.readouterr()
-        assert ".unity-bridge" not in captured.err
+        err = stderr.getvalue()
+        assert ".unity-bridge" not in err
 
-    def test_no_notification_when_gitignore_contains_pattern(self, tmp_path, capsys):
+    def test_no_notification_when_gitignore_contains_pattern(self, tmp_path, monkeypatch):
         """No notification when gitignore contains .unity-bridge pattern (without slash)"""
         gitignore = tmp_path / ".gitignore"
         gitignore.write_text("*.log\n.unity-bridge\ntemp/\n")
 
-        with patch("pathlib.Path.cwd", return_value=tmp_path):
+        stderr = io.StringIO()
+        monkeypatch.chdir(tmp_path)
+        with redirect_stderr(stderr):
             check_gitignore_and_notify()
 
-        captured = capsys.readouterr()
-        assert ".unity-bridge" not in captured.err
+        err = stderr.getvalue()
+        assert ".unity-bridge" not in err
 
-    def test_notification_when_gitignore_missing(self, tmp_path, capsys):
+    def test_notification_when_gitignore_missing(self, tmp_path, monkeypatch):
         """Notification when .gitignore doesn't exist"""
-        # Ensure no .gitignore exists
-        gitignore = tmp_path / ".gitignore"
-        if gitignore.exists():
-            gitignore.unlink()
-
-        with patch("pathlib.Path.cwd", return_value=tmp_path):
-            check_gitignore_and_notify()
+        # tmp_path starts without a .gitignore
+        stderr = io.StringIO()
+        monkeypatch.chdir(tmp_path)
+        with redirect_stderr(stderr):
+            assert check_gitignore_and_notify() is False
 
-        captured = capsys.readouterr()
-        assert ".unity-bridge/" in captured.err
-        assert "gitignore" in captured.err.lower()
+        err = stderr.getvalue()
+        assert ".unity-bridge/" in err
+        assert "gitignore" in err.lower()
 
-    def test_notification_when_gitignore_exists_without_unity_bridge(self, tmp_path, capsys):
+    def test_notification_when_gitignore_exists_without_unity_bridge(self, tmp_path, monkeypatch):
         """Notification when .gitignore exists but doesn't contain .unity-bridge"""
         gitignore = tmp_path / ".gitignore"
         gitignore.write_text("*.log\nnode_modules/\n")
 
-        with patch("pathlib.Path.cwd", return_value=tmp_path):
+        stderr = io.StringIO()
+        monkeypatch.chdir(tmp_path)
+        with redirect_stderr(stderr):
             check_gitignore_and_notify()
 
-        captured = capsys.readouterr()
-        assert ".unity-bridge/" in captured.err
-        assert "gitignore" in captured.err.lower()
+        err = stderr.getvalue()
+        assert ".unity-bridge/" in err
+        assert "gitignore" in err.lower()
 
-    def test_notification_on_first_directory_creation(self, tmp_path, capsys):
+    def test_notification_on_first_directory_creation(self, tmp_path, monkeypatch):
         """Notification is shown when directory is first created"""
         unity_dir = tmp_path / ".unity-bridge"
-        # Ensure no gitignore to trigger notification
-        gitignore = tmp_path / ".gitignore"
-        if gitignore.exists():
-            gitignore.unlink()
+        # No .gitignore in tmp_path, so the notification triggers
 
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            with patch("pathlib.Path.cwd", return_value=tmp_path):
-                write_command("test", {})
+        stderr = io.StringIO()
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        monkeypatch.chdir(tmp_path)
+        with redirect_stderr(stderr):
+            write_command("test", {})
 
-        captured = capsys.readouterr()
-        assert ".unity-bridge/" in captured.err
+        err = stderr.getvalue()
+        assert ".unity-bridge/" in err
 
-    def test_no_notification_on_subsequent_command(self, tmp_path, capsys):
+    def test_no_notification_on_subsequent_command(self, tmp_path, monkeypatch):
         """No notification when directory already exists"""
         unity_dir = tmp_path / ".unity-bridge"
         unity_dir.mkdir()  # Pre-create directory
 
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            with patch("pathlib.Path.cwd", return_value=tmp_path):
-                write_command("test", {})
+        stderr = io.StringIO()
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        monkeypatch.chdir(tmp_path)
+        with redirect_stderr(stderr):
+            write_command("test", {})
 
-        captured = capsys.readouterr()
-        assert ".unity-bridge/" not in captured.err
+        err = stderr.getvalue()
+        assert ".unity-bridge/" not in err
+
+
+@contextmanager
+def _patched_cli(**return_values):
+    """Patch each named cli function to return the given value, under one context manager.
+
+    Yields the mocks by name.
+    """
+    with ExitStack() as stack:
+        yield {
+            name: stack.enter_context(patch(f"claude_unity_bridge.cli.{name}", return_value=value))
+            for name, value in return_values.items()
+        }
+
+
+class _FakePipProcess(namedtuple("_FakePipProcess", "returncode stdout")):
+    """Stand-in for the subprocess.Popen object update_package streams pip output from"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def wait(self):
+        return self.returncode
+
+
+def _fake_pip_process(returncode, lines=()):
+    return _FakePipProcess(returncode, iter(lines))
 
 
 class TestSkillManagement:
@@ -1839,6 +1474,11 @@ class TestSkillManagement:
         target_dir = get_skill_target_dir()
         assert target_dir == Path.home() / ".claude" / "skills" / "unity-bridge"
 
+    def test_skill_dirs_resolved_once(self):
+        """Directory lookups are cached for the lifetime of the process"""
+        assert get_skill_source_dir() is get_skill_source_dir()
+        assert get_skill_target_dir() is get_skill_target_dir()
+
     def test_install_skill_creates_symlink(self, tmp_path, capsys):
         """install_skill should create a symlink or copy to the skill directory"""
         skills_dir = tmp_path / "skills"
@@ -1848,15 +1488,10 @@ class TestSkillManagement:
             (tmp_path / "home" / ".claude").mkdir(parents=True)
 
             # Patch get_claude_skills_dir to use our temp dir
-            with patch(
-                "claude_unity_bridge.cli.get_claude_skills_dir",
-                return_value=skills_dir,
+            with _patched_cli(
+                get_claude_skills_dir=skills_dir, get_skill_target_dir=skills_dir / "unity-bridge"
             ):
-                with patch(
-                    "claude_unity_bridge.cli.get_skill_target_dir",
-                    return_value=skills_dir / "unity-bridge",
-                ):
-                    result = install_skill(verbose=False)
+                result = install_skill(verbose=False)
 
         assert result == EXIT_SUCCESS
         assert (skills_dir / "unity-bridge").exists()
@@ -1867,78 +1502,27 @@ class TestSkillManagement:
         captured = capsys.readouterr()
         assert "Skill installed" in captured.out
 
-    def test_install_skill_replaces_existing_symlink(self, tmp_path, capsys):
-        """install_skill should replace an existing symlink or directory"""
+    @pytest.mark.parametrize(
+        "kind, removal_notice",
+        [
+            pytest.param("symlink", "Removing existing symlink", marks=requires_symlinks),
+            ("directory", "Removing existing directory"),
+            ("file", "Removing existing file"),
+        ],
+    )
+    def test_install_skill_replaces_existing_install(self, tmp_path, capsys, kind, removal_notice):
+        """install_skill should remove whatever occupies the target and install afresh"""
         skills_dir = tmp_path / "skills"
-        skills_dir.mkdir(parents=True)
-
-        # Create an old installation (try symlink, fall back to directory)
-        old_target = tmp_path / "old_skill"
-        old_target.mkdir()
-        (old_target / "old_file.txt").write_text("old")
-        target_path = skills_dir / "unity-bridge"
-
-        try:
-            target_path.symlink_to(old_target)
-            created_symlink = True
-        except OSError:
-            # Can't create symlink (Windows without Developer Mode)
-            # Create a directory instead to simulate old copied installation
-            import shutil
-
-            shutil.copytree(old_target, target_path)
-            created_symlink = False
-
-        with patch(
-            "claude_unity_bridge.cli.get_claude_skills_dir",
-            return_value=skills_dir,
-        ):
-            with patch(
-                "claude_unity_bridge.cli.get_skill_target_dir",
-                return_value=target_path,
-            ):
-                result = install_skill(verbose=True)
-
-        assert result == EXIT_SUCCESS
-        assert target_path.exists()
-        # New installation should not contain old file
-        assert not (target_path / "old_file.txt").exists()
-        # Should contain SKILL.md from new installation
-        assert (target_path / "SKILL.md").exists()
-
-        captured = capsys.readouterr()
-        if created_symlink:
-            assert "Removing existing symlink" in captured.err
-        else:
-            assert "Removing existing directory" in captured.err
-
-    def test_install_skill_removes_existing_directory(self, tmp_path, capsys):
-        """install_skill should remove and replace an existing directory"""
-        skills_dir = tmp_path / "skills"
-        skill_dir = skills_dir / "unity-bridge"
-        skill_dir.mkdir(parents=True)
-
-        # Put a file in it so it's not empty
-        (skill_dir / "some_file.txt").write_text("test")
-
-        with patch(
-            "claude_unity_bridge.cli.get_claude_skills_dir",
-            return_value=skills_dir,
-        ):
-            with patch(
-                "claude_unity_bridge.cli.get_skill_target_dir",
-                return_value=skill_dir,
-            ):
-                result = install_skill(verbose=True)
+        target_path = _make_existing_install(skills_dir / "unity-bridge", kind, tmp_path)
 
-        assert result == EXIT_SUCCESS
-        # Old file should be gone
-        assert not (skill_dir / "some_file.txt").exists()
-        # New skill should be installed
-        assert (skill_dir / "SKILL.md").exists()
+        with _patched_cli(get_claude_skills_dir=skills_dir, get_skill_target_dir=target_path):
+            result = install_skill(verbose=True)
 
-        captured = capsys.readouterr()
-        assert "Removing existing directory" in captured.err
+        assert result == EXIT_SUCCESS
+        # New installation should not contain the old file
+        assert not (target_path / "old_file.txt").exists()
+        assert (target_path / "SKILL.md").exists()
+        _assert_in_stderr(capsys, removal_notice)
 
     def test_install_skill_fails_when_source_missing(self, tmp_path, capsys):
         """install_skill should fail when skill source directory is missing"""
@@ -1950,29 +1534,38 @@ class TestSkillManagement:
 
         assert result == EXIT_ERROR
 
+        _assert_in_stderr(capsys, "Could not find skill files")
+
+    @pytest.mark.parametrize(
+        "kind, removed",
+        [
+            pytest.param("symlink", "symlink", marks=requires_symlinks),
+            ("skill", "directory"),
+        ],
+    )
+    def test_uninstall_skill_removes_install(self, tmp_path, capsys, kind, removed):
+        """uninstall_skill should remove the symlink or copied skill directory"""
+        install_path = _make_existing_install(tmp_path / "skills" / "unity-bridge", kind, tmp_path)
+
+        with patch(
+            "claude_unity_bridge.cli.get_skill_target_dir",
+            return_value=install_path,
+        ):
+            result = uninstall_skill(verbose=False)
+
+        assert result == EXIT_SUCCESS
+        assert not install_path.is_symlink() and not install_path.exists()
+
         captured = capsys.readouterr()
-        assert "Could not find skill files" in captured.err
+        assert f"Skill uninstalled: removed {removed}" in captured.out
 
-    def test_uninstall_skill_removes_symlink(self, tmp_path, capsys):
-        """uninstall_skill should remove the symlink or copied directory"""
+    @requires_symlinks
+    def test_uninstall_skill_removes_dangling_symlink(self, tmp_path, capsys):
+        """A symlink whose package was removed still counts as installed"""
         skills_dir = tmp_path / "skills"
         skills_dir.mkdir(parents=True)
-
-        # Try to create a symlink, fall back to copying if not possible
-        target = tmp_path / "skill_target"
-        target.mkdir()
-        (target / "SKILL.md").write_text("# Skill")
         install_path = skills_dir / "unity-bridge"
-
-        try:
-            install_path.symlink_to(target)
-            is_symlink = True
-        except OSError:
-            # Can't create symlink, use copy instead
-            import shutil
-
-            shutil.copytree(target, install_path)
-            is_symlink = False
+        install_path.symlink_to(tmp_path / "missing-package")
 
         with patch(
             "claude_unity_bridge.cli.get_skill_target_dir",
@@ -1981,14 +1574,8 @@ class TestSkillManagement:
             result = uninstall_skill(verbose=False)
 
         assert result == EXIT_SUCCESS
-        assert not install_path.exists()
-
-        captured = capsys.readouterr()
-        assert "Skill uninstalled" in captured.out
-        if is_symlink:
-            assert "symlink" in captured.out
-        else:
-            assert "directory" in captured.out
+        assert not install_path.is_symlink()
+        assert "removed symlink" in capsys.readouterr().out
 
     def test_uninstall_skill_idempotent(self, tmp_path, capsys):
         """uninstall_skill should succeed even when skill is not installed"""
@@ -2007,157 +1594,205 @@ class TestSkillManagement:
         captured = capsys.readouterr()
         assert "not installed" in captured.out
 
-    def test_uninstall_skill_removes_skill_directory(self, tmp_path, capsys):
-        """uninstall_skill should remove a directory that contains SKILL.md"""
+    def test_main_install_skill(self):
+        """Test install-skill command via main()"""
+        with _patched_cli(install_skill=EXIT_SUCCESS) as mocks:
+            exit_code = main(["install-skill"])
+
+        assert exit_code == EXIT_SUCCESS
+        mocks["install_skill"].assert_called_once_with(False, force=False)
+
+    def test_main_uninstall_skill(self):
+        """Test uninstall-skill command via main()"""
+        with _patched_cli(uninstall_skill=EXIT_ERROR) as mocks:
+            exit_code = main(["uninstall-skill"])
+
+        # The handler's exit code is passed straight through
+        assert exit_code == EXIT_ERROR
+        mocks["uninstall_skill"].assert_called_once_with(False)
+
+    def test_update_package_success(self, tmp_path, capsys):
+        """update_package should upgrade pip package and reinstall skill"""
         skills_dir = tmp_path / "skills"
-        skill_dir = skills_dir / "unity-bridge"
-        skill_dir.mkdir(parents=True)
-        # Add SKILL.md to make it look like a valid skill installation
-        (skill_dir / "SKILL.md").write_text("# Skill")
 
-        with patch(
-            "claude_unity_bridge.cli.get_skill_target_dir",
-            return_value=skill_dir,
-        ):
-            result = uninstall_skill(verbose=False)
+        with patch("subprocess.Popen", return_value=_fake_pip_process(0)):
+            with _patched_cli(
+                get_claude_skills_dir=skills_dir, get_skill_target_dir=skills_dir / "unity-bridge"
+            ):
+                result = update_package(verbose=False)
 
         assert result == EXIT_SUCCESS
-        assert not skill_dir.exists()
 
         captured = capsys.readouterr()
-        assert "Skill uninstalled: removed directory" in captured.out
+        assert "Updating" in captured.out
 
-    def test_main_install_skill(self, tmp_path, capsys):
-        """Test install-skill command via main()"""
-        skills_dir = tmp_path / "skills"
+    def test_update_package_pip_failure(self, capsys):
+        """update_package should fail when pip upgrade fails"""
+        process = _fake_pip_process(1, ["Collecting claude-unity-bridge\n", "pip error\n"])
 
-        with patch("sys.argv", ["unity-bridge", "install-skill"]):
-            with patch(
-                "claude_unity_bridge.cli.get_claude_skills_dir",
-                return_value=skills_dir,
-            ):
-                with patch(
-                    "claude_unity_bridge.cli.get_skill_target_dir",
-                    return_value=skills_dir / "unity-bridge",
-                ):
-                    exit_code = main()
+        with patch("subprocess.Popen", return_value=process):
+            result = update_package(verbose=False)
 
-        assert exit_code == EXIT_SUCCESS
+        assert result == EXIT_ERROR
 
-    def test_main_uninstall_skill(self, tmp_path, capsys):
-        """Test uninstall-skill command via main()"""
+        _assert_in_stderr(capsys, "pip upgrade failed", "pip error")
+
+    def test_update_package_streams_output_when_verbose(self, tmp_path, capsys):
+        """Verbose updates show pip output as it arrives"""
         skills_dir = tmp_path / "skills"
-        skills_dir.mkdir(parents=True)
+        process = _fake_pip_process(0, ["Successfully installed claude-unity-bridge\n"])
 
-        # Create an installation to uninstall (try symlink, fall back to copy)
-        target = tmp_path / "skill_target"
-        target.mkdir()
-        (target / "SKILL.md").write_text("# Skill")
-        install_path = skills_dir / "unity-bridge"
+        with patch("subprocess.Popen", return_value=process):
+            with _patched_cli(
+                get_claude_skills_dir=skills_dir, get_skill_target_dir=skills_dir / "unity-bridge"
+            ):
+                result = update_package(verbose=True)
 
-        try:
-            install_path.symlink_to(target)
-        except OSError:
-            # Can't create symlink, use copy instead
-            import shutil
+        assert result == EXIT_SUCCESS
+        _assert_in_stderr(capsys, "Successfully installed claude-unity-bridge")
 
-            shutil.copytree(target, install_path)
+    def test_update_package_keeps_tail_of_quiet_output(self, capsys):
+        """Only the last lines of pip output are reported on failure"""
+        lines = [f"line {i}\n" for i in range(PIP_OUTPUT_TAIL_LINES + 5)]
 
-        with patch("sys.argv", ["unity-bridge", "uninstall-skill"]):
-            with patch(
-                "claude_unity_bridge.cli.get_skill_target_dir",
-                return_value=install_path,
-            ):
-                exit_code = main()
+        with patch("subprocess.Popen", return_value=_fake_pip_process(1, lines)):
+            update_package(verbose=False)
 
-        assert exit_code == EXIT_SUCCESS
+        captured = capsys.readouterr()
+        assert "line 4\n" not in captured.err
+        assert "line 5\n" in captured.err
+        assert f"line {PIP_OUTPUT_TAIL_LINES + 4}" in captured.err
 
-    def test_install_skill_removes_regular_file(self, tmp_path, capsys):
-        """install_skill should remove and replace a regular file"""
+    def test_update_package_skips_up_to_date_skill(self, tmp_path, capsys):
+        """update_package leaves a skill installed from the current package alone"""
         skills_dir = tmp_path / "skills"
-        skills_dir.mkdir(parents=True)
-        target_file = skills_dir / "unity-bridge"
-        target_file.write_text("not a symlink or directory")
+        target_dir = skills_dir / "unity-bridge"
 
-        with patch(
-            "claude_unity_bridge.cli.get_claude_skills_dir",
-            return_value=skills_dir,
+        with _patched_cli(
+            _get_package_version="1.0.0",
+            get_claude_skills_dir=skills_dir,
+            get_skill_target_dir=target_dir,
         ):
-            with patch(
-                "claude_unity_bridge.cli.get_skill_target_dir",
-                return_value=target_file,
-            ):
-                result = install_skill(verbose=True)
+            assert install_skill(verbose=False) == EXIT_SUCCESS
+            assert is_skill_up_to_date()
+            capsys.readouterr()
+
+            with patch("claude_unity_bridge.cli.install_skill") as mock_install:
+                with patch("subprocess.Popen", return_value=_fake_pip_process(0)):
+                    result = update_package(verbose=False)
 
         assert result == EXIT_SUCCESS
-        # Should now be a directory (or symlink), not a file
-        assert target_file.is_dir() or target_file.is_symlink()
-        # Should contain SKILL.md
-        assert (target_file / "SKILL.md").exists()
+        mock_install.assert_not_called()
+        assert "Skill up-to-date" in capsys.readouterr().out
 
-        captured = capsys.readouterr()
-        assert "Removing existing file" in captured.err
+    def test_update_package_reinstalls_after_version_change(self, tmp_path):
+        """A new package version invalidates the install manifest"""
+        skills_dir = tmp_path / "skills"
+        target_dir = skills_dir / "unity-bridge"
 
-    def test_update_package_success(self, tmp_path, capsys):
-        """update_package should upgrade pip package and reinstall skill"""
+        with _patched_cli(get_claude_skills_dir=skills_dir, get_skill_target_dir=target_dir):
+            with patch("claude_unity_bridge.cli._get_package_version", return_value="1.0.0"):
+                install_skill(verbose=False)
+            with patch("claude_unity_bridge.cli._get_package_version", return_value="1.1.0"):
+                assert not is_skill_up_to_date()
+                with patch(
+                    "claude_unity_bridge.cli.install_skill", return_value=EXIT_SUCCESS
+                ) as mock_install:
+                    with patch("subprocess.Popen", return_value=_fake_pip_process(0)):
+                        update_package(verbose=False)
+
+        mock_install.assert_called_once()
+
+    def test_skill_not_up_to_date_after_in_place_edit(self, tmp_path):
+        """Editing a file inside the skill source invalidates the install manifest"""
+        source_dir = tmp_path / "source"
+        source_dir.mkdir()
+        skill_file = source_dir / "SKILL.md"
+        skill_file.write_text("# Skill")
         skills_dir = tmp_path / "skills"
 
-        mock_result = type("Result", (), {"returncode": 0, "stderr": ""})()
+        with _patched_cli(
+            _get_package_version="1.0.0",
+            get_skill_source_dir=source_dir,
+            get_claude_skills_dir=skills_dir,
+            get_skill_target_dir=skills_dir / "unity-bridge",
+        ):
+            assert install_skill(verbose=False) == EXIT_SUCCESS
+            assert is_skill_up_to_date()
+
+            newer = source_dir.stat().st_mtime + 10
+            os.utime(skill_file, (newer, newer))
+            assert not is_skill_up_to_date()
 
-        with patch("subprocess.run", return_value=mock_result):
+    def test_update_package_force_reinstalls(self, tmp_path):
+        """--force reinstalls even when the manifest matches"""
+        with patch("claude_unity_bridge.cli.is_skill_up_to_date", return_value=True):
             with patch(
-                "claude_unity_bridge.cli.get_claude_skills_dir",
-                return_value=skills_dir,
-            ):
-                with patch(
-                    "claude_unity_bridge.cli.get_skill_target_dir",
-                    return_value=skills_dir / "unity-bridge",
-                ):
-                    result = update_package(verbose=False)
+                "claude_unity_bridge.cli.install_skill", return_value=EXIT_SUCCESS
+            ) as mock_install:
+                with patch("subprocess.Popen", return_value=_fake_pip_process(0)):
+                    result = update_package(verbose=False, force=True)
 
         assert result == EXIT_SUCCESS
+        mock_install.assert_called_once()
 
-        captured = capsys.readouterr()
-        assert "Updating" in captured.out
+    def test_install_skill_skips_up_to_date_skill(self, tmp_path, capsys):
+        """Installing again from the same package is a no-op unless forced"""
+        skills_dir = tmp_path / "skills"
+        target_dir = skills_dir / "unity-bridge"
 
-    def test_update_package_pip_failure(self, capsys):
-        """update_package should fail when pip upgrade fails"""
-        mock_result = type("Result", (), {"returncode": 1, "stderr": "pip error"})()
+        with _patched_cli(
+            _get_package_version="1.0.0",
+            get_claude_skills_dir=skills_dir,
+            get_skill_target_dir=target_dir,
+        ):
+            assert install_skill(verbose=False) == EXIT_SUCCESS
+            capsys.readouterr()
 
-        with patch("subprocess.run", return_value=mock_result):
-            result = update_package(verbose=False)
+            with patch("claude_unity_bridge.cli._copy_skill_tree") as mock_copy:
+                with patch("os.symlink") as mock_symlink:
+                    assert install_skill(verbose=False) == EXIT_SUCCESS
+                    mock_symlink.assert_not_called()
+                    mock_copy.assert_not_called()
+                    assert "Skill up-to-date" in capsys.readouterr().out
 
-        assert result == EXIT_ERROR
+                    install_skill(verbose=False, force=True)
+                    assert mock_symlink.called or mock_copy.called
 
-        captured = capsys.readouterr()
-        assert "pip upgrade failed" in captured.err
+    def test_skill_not_up_to_date_without_manifest(self, tmp_path):
+        """A missing or removed installation is never considered up to date"""
+        skills_dir = tmp_path / "skills"
+        target_dir = skills_dir / "unity-bridge"
+
+        with _patched_cli(
+            _get_package_version="1.0.0",
+            get_claude_skills_dir=skills_dir,
+            get_skill_target_dir=target_dir,
+        ):
+            assert not is_skill_up_to_date()
+            install_skill(verbose=False)
+            uninstall_skill(verbose=False)
+            assert not is_skill_up_to_date()
+            assert not (skills_dir / ".unity-bridge.installed").exists()
 
     def test_update_package_subprocess_exception(self, capsys):
         """update_package should handle subprocess exceptions"""
-        with patch("subprocess.run", side_effect=OSError("command not found")):
+        with patch("subprocess.Popen", side_effect=OSError("command not found")):
             result = update_package(verbose=False)
 
         assert result == EXIT_ERROR
 
-        captured = capsys.readouterr()
-        assert "Could not run pip" in captured.err
+        _assert_in_stderr(capsys, "Could not run pip")
 
-    def test_main_update(self, tmp_path, capsys):
+    def test_main_update(self, tmp_path):
         """Test update command via main()"""
         skills_dir = tmp_path / "skills"
-        mock_result = type("Result", (), {"returncode": 0, "stderr": ""})()
-
-        with patch("sys.argv", ["unity-bridge", "update"]):
-            with patch("subprocess.run", return_value=mock_result):
-                with patch(
-                    "claude_unity_bridge.cli.get_claude_skills_dir",
-                    return_value=skills_dir,
-                ):
-                    with patch(
-                        "claude_unity_bridge.cli.get_skill_target_dir",
-                        return_value=skills_dir / "unity-bridge",
-                    ):
-                        exit_code = main()
+        with patch("subprocess.Popen", return_value=_fake_pip_process(0)):
+            with _patched_cli(
+                get_claude_skills_dir=skills_dir,
+                get_skill_target_dir=skills_dir / "unity-bridge",
+            ):
+                exit_code = main(["update"])
 
         assert exit_code == EXIT_SUCCESS
 
@@ -2171,15 +1806,8 @@ class TestSkillManagement:
             raise OSError("[WinError 1314] A required privilege is not held by the client")
 
         with patch.object(Path, "symlink_to", mock_symlink_to):
-            with patch(
-                "claude_unity_bridge.cli.get_claude_skills_dir",
-                return_value=skills_dir,
-            ):
-                with patch(
-                    "claude_unity_bridge.cli.get_skill_target_dir",
-                    return_value=target_dir,
-                ):
-                    result = install_skill(verbose=True)
+            with _patched_cli(get_claude_skills_dir=skills_dir, get_skill_target_dir=target_dir):
+                result = install_skill(verbose=True)
 
         assert result == EXIT_SUCCESS
         assert target_dir.exists()
@@ -2193,6 +1821,33 @@ class TestSkillManagement:
         assert "Skill installed (copy)" in captured.out
         assert "Using directory copy instead of symlink" in captured.out
 
+    def test_copy_skill_tree_hardlinks_files(self, tmp_path):
+        """Copied skill files share storage with the package when possible"""
+        source = tmp_path / "source"
+        (source / "references").mkdir(parents=True)
+        (source / "SKILL.md").write_text("skill")
+        (source / "references" / "COMMANDS.md").write_text("commands")
+        target = tmp_path / "target"
+
+        _copy_skill_tree(source, target)
+
+        assert (target / "SKILL.md").read_text() == "skill"
+        assert (target / "SKILL.md").stat().st_ino == (source / "SKILL.md").stat().st_ino
+        assert (target / "references" / "COMMANDS.md").read_text() == "commands"
+
+    def test_copy_skill_tree_falls_back_when_linking_fails(self, tmp_path):
+        """A real copy is made when hardlinks aren't possible (e.g. across devices)"""
+        source = tmp_path / "source"
+        source.mkdir()
+        (source / "SKILL.md").write_text("skill")
+        target = tmp_path / "target"
+
+        with patch("os.link", side_effect=OSError("Invalid cross-device link")):
+            _copy_skill_tree(source, target)
+
+        assert (target / "SKILL.md").read_text() == "skill"
+        assert (target / "SKILL.md").stat().st_ino != (source / "SKILL.md").stat().st_ino
+
     def test_install_skill_copy_fallback_failure(self, tmp_path, capsys):
         """install_skill should fail gracefully when both symlink and copy fail"""
         skills_dir = tmp_path / "skills"
@@ -2204,73 +1859,14 @@ class TestSkillManagement:
 
         with patch.object(Path, "symlink_to", mock_symlink_to):
             with patch("shutil.copytree", side_effect=PermissionError("Permission denied")):
-                with patch(
-                    "claude_unity_bridge.cli.get_claude_skills_dir",
-                    return_value=skills_dir,
+                with _patched_cli(
+                    get_claude_skills_dir=skills_dir, get_skill_target_dir=target_dir
                 ):
-                    with patch(
-                        "claude_unity_bridge.cli.get_skill_target_dir",
-                        return_value=target_dir,
-                    ):
-                        result = install_skill(verbose=False)
+                    result = install_skill(verbose=False)
 
         assert result == EXIT_ERROR
 
-        captured = capsys.readouterr()
-        assert "Could not create symlink or copy directory" in captured.err
-
-    def test_install_skill_replaces_existing_directory(self, tmp_path, capsys):
-        """install_skill should replace an existing copied directory"""
-        skills_dir = tmp_path / "skills"
-        skills_dir.mkdir(parents=True)
-        target_dir = skills_dir / "unity-bridge"
-
-        # Create an existing directory (from previous copy install)
-        target_dir.mkdir()
-        (target_dir / "old_file.txt").write_text("old")
-
-        with patch(
-            "claude_unity_bridge.cli.get_claude_skills_dir",
-            return_value=skills_dir,
-        ):
-            with patch(
-                "claude_unity_bridge.cli.get_skill_target_dir",
-                return_value=target_dir,
-            ):
-                result = install_skill(verbose=True)
-
-        assert result == EXIT_SUCCESS
-        assert target_dir.exists()
-        # Old file should be gone
-        assert not (target_dir / "old_file.txt").exists()
-        # New skill should be present
-        assert (target_dir / "SKILL.md").exists()
-
-        captured = capsys.readouterr()
-        assert "Removing existing directory" in captured.err
-
-    def test_uninstall_skill_removes_copied_directory(self, tmp_path, capsys):
-        """uninstall_skill should remove a copied skill directory"""
-        skills_dir = tmp_path / "skills"
-        skills_dir.mkdir(parents=True)
-        target_dir = skills_dir / "unity-bridge"
-
-        # Simulate a copied installation
-        target_dir.mkdir()
-        (target_dir / "SKILL.md").write_text("# Skill")
-        (target_dir / "scripts").mkdir()
-
-        with patch(
-            "claude_unity_bridge.cli.get_skill_target_dir",
-            return_value=target_dir,
-        ):
-            result = uninstall_skill(verbose=False)
-
-        assert result == EXIT_SUCCESS
-        assert not target_dir.exists()
-
-        captured = capsys.readouterr()
-        assert "Skill uninstalled: removed directory" in captured.out
+        _assert_in_stderr(capsys, "Could not create symlink or copy directory")
 
     def test_uninstall_skill_warns_on_non_skill_directory(self, tmp_path, capsys):
         """uninstall_skill should warn when directory doesn't look like a skill"""
@@ -2290,8 +1886,7 @@ class TestSkillManagement:
 
         assert result == EXIT_ERROR
 
-        captured = capsys.readouterr()
-        assert "doesn't appear to be a skill installation" in captured.err
+        _assert_in_stderr(capsys, "doesn't appear to be a skill installation")
 
 
 class TestUUIDValidation:
@@ -2299,249 +1894,231 @@ class TestUUIDValidation:
 
     def test_valid_uuid_accepted(self):
         """Valid UUID format should not raise"""
-        _validate_command_id("a1b2c3d4-e5f6-7890-abcd-ef1234567890")
-
-    def test_invalid_uuid_rejected(self):
-        """Non-UUID strings should raise UnityCommandError"""
-        with pytest.raises(UnityCommandError, match="Invalid command ID format"):
-            _validate_command_id("not-a-uuid")
-
-    def test_path_traversal_rejected(self):
-        """Path traversal attempts should be rejected"""
-        with pytest.raises(UnityCommandError, match="Invalid command ID format"):
-            _validate_command_id("../../etc/passwd")
-
-    def test_empty_string_rejected(self):
-        """Empty string should be rejected"""
-        with pytest.raises(UnityCommandError, match="Invalid command ID format"):
-            _validate_command_id("")
-
-    def test_uuid_with_extra_chars_rejected(self):
-        """UUID with trailing path components should be rejected"""
+        _validate_command_id(COMMAND_ID)
+
+    def test_validation_uses_precompiled_pattern(self):
+        """Validation matches against UUID_PATTERN without going through the re cache"""
+        with patch("claude_unity_bridge.cli.re") as mock_re:
+            _validate_command_id(COMMAND_ID)
+
+        assert mock_re.mock_calls == []
+
+    def test_generated_ids_are_valid_and_unique(self):
+        """Generated command ids keep the UUID layout that Unity and the CLI validate"""
+        ids = [_new_command_id() for _ in range(1000)]
+
+        for command_id in ids:
+            _validate_command_id(command_id)
+        assert len(set(ids)) == len(ids)
+
+    @pytest.mark.parametrize(
+        "command_id",
+        [
+            "not-a-uuid",
+            "../../etc/passwd",  # path traversal
+            "",
+            "a1b2c3d4-e5f6-7890-abcd-ef1234567890/../secret",  # trailing path components
+            "a1b2c3d4-e5f6-7890-abcd-ef1234567890\n",  # must not slip past the anchor
+            "{a1b2c3d4-e5f6-7890-abcd-ef12345678}",  # only the canonical hyphenated form
+        ],
+        ids=["not-uuid", "traversal", "empty", "extra-chars", "trailing-newline", "braced"],
+    )
+    def test_invalid_uuid_rejected(self, command_id):
+        """Anything but a canonical UUID should raise UnityCommandError"""
         with pytest.raises(UnityCommandError, match="Invalid command ID format"):
-            _validate_command_id("a1b2c3d4-e5f6-7890-abcd-ef1234567890/../secret")
+            _validate_command_id(command_id)
 
-    def test_wait_for_response_validates_id(self, tmp_path):
+    def test_wait_for_response_validates_id(self, unity_dir):
         """wait_for_response should reject invalid command IDs"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with pytest.raises(UnityCommandError, match="Invalid command ID format"):
-                wait_for_response("../../etc/passwd", timeout=1)
+        with pytest.raises(UnityCommandError, match="Invalid command ID format"):
+            wait_for_response("../../etc/passwd", timeout=1)
 
-    def test_cleanup_response_file_validates_id(self, tmp_path):
+    def test_cleanup_response_file_validates_id(self, unity_dir):
         """cleanup_response_file should reject invalid command IDs"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            with pytest.raises(UnityCommandError, match="Invalid command ID format"):
-                cleanup_response_file("../../etc/passwd")
+        with pytest.raises(UnityCommandError, match="Invalid command ID format"):
+            cleanup_response_file("../../etc/passwd")
 
-    def test_response_id_mismatch_rejected(self, tmp_path):
+    def test_response_id_mismatch_rejected(self, unity_dir):
         """Response with mismatched ID should raise UnityCommandError"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_id = "a1b2c3d4-e5f6-7890-abcd-ef1234567890"
-            response_file = tmp_path / f"response-{command_id}.json"
-            response_file.write_text(json.dumps({"id": "different-id", "status": "success"}))
+        command_id = COMMAND_ID
+        response_file = unity_dir / f"response-{command_id}.json"
+        _write_json(response_file, {"id": "different-id", "status": "success"})
 
-            with pytest.raises(UnityCommandError, match="Response ID mismatch"):
-                wait_for_response(command_id, timeout=1)
+        with pytest.raises(UnityCommandError, match="Response ID mismatch"):
+            wait_for_response(command_id, timeout=1)
 
 
 @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions not supported on Windows")
 class TestDirectoryPermissions:
     """Test that .unity-bridge/ directory and files get restrictive permissions"""
 
-    def test_directory_created_with_0700_permissions(self, tmp_path):
-        import os
-        import stat
-
+    def test_new_directory_and_command_file_permissions(self, tmp_path, monkeypatch):
+        """One write creates a 0700 directory holding a 0600 command file"""
         unity_dir = tmp_path / ".unity-bridge"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            write_command("test-action", {"param": "value"})
-        mode = os.stat(unity_dir).st_mode
-        dir_perms = stat.S_IMODE(mode)
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        write_command("test-action", {"param": "value"})
+
+        dir_perms = stat.S_IMODE(os.stat(unity_dir).st_mode)
         assert dir_perms == 0o700, f"Expected 0o700, got {oct(dir_perms)}"
+        file_perms = stat.S_IMODE(os.stat(unity_dir / "command.json").st_mode)
+        assert file_perms == 0o600, f"Expected 0o600, got {oct(file_perms)}"
 
-    def test_command_file_has_0600_permissions(self, tmp_path):
-        import os
-        import stat
+    def test_existing_directory_permissions_tightened(self, tmp_path, monkeypatch):
+        unity_dir = tmp_path / ".unity-bridge"
+        unity_dir.mkdir(mode=0o755)
+        os.chmod(unity_dir, 0o755)
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        write_command("test-action", {})
+        assert stat.S_IMODE(os.stat(unity_dir).st_mode) == 0o700
 
+    def test_existing_private_directory_not_rechmodded(self, tmp_path, monkeypatch):
         unity_dir = tmp_path / ".unity-bridge"
-        with patch("claude_unity_bridge.cli.UNITY_DIR", unity_dir):
-            write_command("test-action", {"param": "value"})
-        command_file = unity_dir / "command.json"
-        mode = os.stat(command_file).st_mode
-        file_perms = stat.S_IMODE(mode)
-        assert file_perms == 0o600, f"Expected 0o600, got {oct(file_perms)}"
+        unity_dir.mkdir(mode=0o700)
+        monkeypatch.setattr(cli, "UNITY_DIR", unity_dir)
+        with patch("claude_unity_bridge.cli.os.chmod") as mock_chmod:
+            write_command("test-action", {})
+        mock_chmod.assert_not_called()
 
 
 class TestCleanupStaleCommandFile:
     """Test cleanup_stale_command_file function"""
 
-    def test_removes_stale_command_file(self, tmp_path):
+    def test_removes_stale_command_file(self, unity_dir):
         """Stale command.json older than timeout is removed"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import os
-
-            command_file = tmp_path / "command.json"
-            command_file.write_text('{"id": "stale", "action": "compile"}')
-
-            # Make it old (older than 30s timeout)
-            old_time = time.time() - 60
-            os.utime(command_file, (old_time, old_time))
+        # Older than the 30s timeout
+        (command_file,) = _place_aged_files(
+            unity_dir, [("command.json", '{"id": "stale", "action": "compile"}', 60)]
+        )
 
-            cleanup_stale_command_file(timeout=30)
-            assert not command_file.exists()
+        cleanup_stale_command_file(timeout=30)
+        assert not command_file.exists()
 
-    def test_keeps_fresh_command_file(self, tmp_path):
+    def test_keeps_fresh_command_file(self, unity_dir):
         """Recent command.json within timeout is kept"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            command_file = tmp_path / "command.json"
-            command_file.write_text('{"id": "fresh", "action": "compile"}')
+        command_file = unity_dir / "command.json"
+        command_file.write_text('{"id": "fresh", "action": "compile"}')
 
-            cleanup_stale_command_file(timeout=30)
-            assert command_file.exists()
+        cleanup_stale_command_file(timeout=30)
+        assert command_file.exists()
 
-    def test_no_command_file(self, tmp_path):
+    def test_no_command_file(self, unity_dir):
         """No error when command.json doesn't exist"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            cleanup_stale_command_file(timeout=30)  # Should not raise
+        cleanup_stale_command_file(timeout=30)  # Should not raise
 
-    def test_verbose_output(self, tmp_path, capsys):
+    def test_verbose_output(self, unity_dir, capsys):
         """Verbose mode logs stale command file cleanup"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import os
-
-            command_file = tmp_path / "command.json"
-            command_file.write_text('{"id": "stale"}')
-            old_time = time.time() - 60
-            os.utime(command_file, (old_time, old_time))
+        _place_aged_files(unity_dir, [("command.json", '{"id": "stale"}', 60)])
 
-            cleanup_stale_command_file(timeout=30, verbose=True)
+        cleanup_stale_command_file(timeout=30, verbose=True)
 
-            captured = capsys.readouterr()
-            assert "stale command file" in captured.err
+        _assert_in_stderr(capsys, "stale command file")
 
 
 class TestCleanupOldResponsesWithTmpFiles:
     """Test that cleanup_old_responses also cleans .tmp files"""
 
-    def test_cleanup_old_tmp_files(self, tmp_path):
+    def test_cleanup_old_tmp_files(self, unity_dir):
         """Old .tmp files are cleaned up alongside response files"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import os
+        old_tmp, recent_tmp = _place_aged_files(
+            unity_dir,
+            [
+                ("command.json.tmp", "temp data", 7200),  # 2 hours ago
+                ("response-abc.json.tmp", "recent temp", 0),
+            ],
+        )
 
-            # Create old tmp file
-            old_tmp = tmp_path / "command.json.tmp"
-            old_tmp.write_text("temp data")
-            old_time = time.time() - 7200  # 2 hours ago
-            os.utime(old_tmp, (old_time, old_time))
+        cleanup_old_responses(max_age_hours=1)
 
-            # Create recent tmp file
-            recent_tmp = tmp_path / "response-abc.json.tmp"
-            recent_tmp.write_text("recent temp")
+        assert not old_tmp.exists()
+        assert recent_tmp.exists()
 
-            cleanup_old_responses(max_age_hours=1)
+    def test_cleanup_both_response_and_tmp(self, unity_dir, virtual_clock):
+        """Both old response files and old tmp files are cleaned"""
+        old_response = unity_dir / "response-old.json"
+        old_response.write_text('{"id": "old"}')
 
-            assert not old_tmp.exists()
-            assert recent_tmp.exists()
+        old_tmp = unity_dir / "something.tmp"
+        old_tmp.write_text("old temp")
 
-    def test_cleanup_both_response_and_tmp(self, tmp_path):
-        """Both old response files and old tmp files are cleaned"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import os
+        virtual_clock.now = time.time() + 7200
+        cleanup_old_responses(max_age_hours=1)
+
+        assert not old_response.exists()
+        assert not old_tmp.exists()
+
+    def test_cleanup_ignores_files_removed_concurrently(self, unity_dir, capsys, virtual_clock):
+        """A file deleted by someone else mid-scan is not reported as a failure"""
+        old_response = unity_dir / "response-gone.json"
+        old_response.write_text("{}")
 
-            old_time = time.time() - 7200
+        virtual_clock.now = time.time() + 7200
+        with patch("claude_unity_bridge.cli.os.unlink", side_effect=FileNotFoundError()):
+            cleanup_old_responses(max_age_hours=1, verbose=True)
 
-            old_response = tmp_path / "response-old.json"
-            old_response.write_text('{"id": "old"}')
-            os.utime(old_response, (old_time, old_time))
+        assert "Warning" not in capsys.readouterr().err
 
-            old_tmp = tmp_path / "something.tmp"
-            old_tmp.write_text("old temp")
-            os.utime(old_tmp, (old_time, old_time))
+    def test_cleanup_leaves_unrelated_files(self, unity_dir, virtual_clock):
+        """Old files that match neither pattern are left alone"""
+        build_config = unity_dir / "build.json"
+        build_config.write_text("{}")
 
-            cleanup_old_responses(max_age_hours=1)
+        virtual_clock.now = time.time() + 7200
+        cleanup_old_responses(max_age_hours=1)
 
-            assert not old_response.exists()
-            assert not old_tmp.exists()
+        assert build_config.exists()
 
 
 class TestResponseCleanupOnError:
     """Test that response files are cleaned up even on timeout/error"""
 
-    def test_response_file_cleaned_on_timeout(self, tmp_path):
+    def test_response_file_cleaned_on_timeout(self, unity_dir):
         """Response file is cleaned up when CommandTimeoutError is raised"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import uuid
-
-            command_id = str(uuid.uuid4())
+        command_id = str(uuid.uuid4())
 
-            def mock_write(action, params):
-                # Create a response file that might exist from a partial operation
-                response_file = tmp_path / f"response-{command_id}.json"
-                response_file.write_text('{"partial": true}')
-                return command_id
-
-            with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                with patch(
-                    "claude_unity_bridge.cli.wait_for_response",
-                    side_effect=CommandTimeoutError("Timed out"),
-                ):
-                    with pytest.raises(CommandTimeoutError):
-                        execute_command("compile", {}, timeout=5)
+        # A response file that might exist from a partial operation
+        mock_write = _responding_write(unity_dir, command_id, b'{"partial": true}')
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            with patch(
+                "claude_unity_bridge.cli._wait_for_raw_response",
+                side_effect=CommandTimeoutError("Timed out"),
+            ):
+                with pytest.raises(CommandTimeoutError):
+                    execute_command("compile", {}, timeout=5)
 
-                    # Response file should be cleaned up despite the error
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    assert not response_file.exists()
+                # Response file should be cleaned up despite the error
+                response_file = unity_dir / f"response-{command_id}.json"
+                assert not response_file.exists()
 
-    def test_response_file_cleaned_on_format_error(self, tmp_path):
+    def test_response_file_cleaned_on_format_error(self, unity_dir):
         """Response file is cleaned up when format_response raises"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import uuid
-
-            command_id = str(uuid.uuid4())
-            response_data = {
-                "id": command_id,
-                "status": "success",
-                "action": "compile",
-                "duration_ms": 100,
-            }
-
-            def mock_write(action, params):
-                response_file = tmp_path / f"response-{command_id}.json"
-                response_file.write_text(json.dumps(response_data))
-                return command_id
-
-            with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                with patch(
-                    "claude_unity_bridge.cli.format_response",
-                    side_effect=RuntimeError("Format error"),
-                ):
-                    with pytest.raises(RuntimeError, match="Format error"):
-                        execute_command("compile", {}, timeout=5)
+        command_id = str(uuid.uuid4())
+        mock_write = _responding_write(unity_dir, command_id, SUCCESS_COMPILE_JSON)
+        with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
+            with patch(
+                "claude_unity_bridge.cli.format_response",
+                side_effect=RuntimeError("Format error"),
+            ):
+                with pytest.raises(RuntimeError, match="Format error"):
+                    execute_command("compile", {}, timeout=5)
 
-                    # Response file should be cleaned up despite the error
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    assert not response_file.exists()
+                # Response file should be cleaned up despite the error
+                response_file = unity_dir / f"response-{command_id}.json"
+                assert not response_file.exists()
 
-    def test_cleanup_handles_missing_response_file_on_timeout(self, tmp_path):
+    def test_cleanup_handles_missing_response_file_on_timeout(self, unity_dir):
         """No error when response file doesn't exist during timeout cleanup"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            import uuid
+        command_id = str(uuid.uuid4())
 
-            command_id = str(uuid.uuid4())
-
-            def mock_write(action, params):
-                # Don't create response file — simulates Unity never responding
-                return command_id
-
-            with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                with patch(
-                    "claude_unity_bridge.cli.wait_for_response",
-                    side_effect=CommandTimeoutError("Timed out"),
-                ):
-                    with pytest.raises(CommandTimeoutError):
-                        execute_command("compile", {}, timeout=5)
+        # Don't create response file — simulates Unity never responding
+        with patch("claude_unity_bridge.cli.write_command", return_value=command_id):
+            with patch(
+                "claude_unity_bridge.cli._wait_for_raw_response",
+                side_effect=CommandTimeoutError("Timed out"),
+            ):
+                with pytest.raises(CommandTimeoutError):
+                    execute_command("compile", {}, timeout=5)
 
-                    # Should not raise — cleanup_response_file handles missing files
+                # Should not raise — cleanup_response_file handles missing files
 
 
 class TestMainBuildCommand:
@@ -2551,236 +2128,267 @@ class TestMainBuildCommand:
         """BUILD_DEFAULT_TIMEOUT should be 300 seconds (5 minutes)"""
         assert BUILD_DEFAULT_TIMEOUT == 300
 
-    def test_main_build_direct(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = ["unity-bridge", "build", "--target", "Android", "--timeout", "1"]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    assert action == "build"
-                    assert params.get("target") == "Android"
-                    command_id = "a1b2c3d4-e5f6-7890-abcd-ef0123456789"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "build",
-                                "duration_ms": 45000,
-                                "buildInfo": {
-                                    "buildResult": "Succeeded",
-                                    "totalErrors": 0,
-                                    "totalWarnings": 0,
-                                    "totalSeconds": 45.0,
-                                    "outputPath": "/path/to/build.apk",
-                                    "sizeBytes": 50000000,
-                                    "method": "direct",
-                                },
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_build_with_method(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = [
-                "unity-bridge",
-                "build",
-                "--method",
-                "MXR.Builder.BuildEntryPoints.BuildQuest",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    assert action == "build"
-                    assert params["method"] == "MXR.Builder.BuildEntryPoints.BuildQuest"
-                    command_id = "b2c3d4e5-f6a7-8901-bcde-f01234567890"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "build",
-                                "duration_ms": 120000,
-                                "buildInfo": {
-                                    "buildResult": "Succeeded",
-                                    "totalErrors": 0,
-                                    "totalWarnings": 0,
-                                    "totalSeconds": 120.0,
-                                    "outputPath": "",
-                                    "sizeBytes": 0,
-                                    "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
-                                },
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_build_with_env(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            argv = [
-                "unity-bridge",
-                "build",
-                "--method",
-                "MXR.Builder.BuildEntryPoints.BuildQuest",
-                "--env",
-                "BUILD_TYPE=production",
-                "--env",
-                "SCRIPTING_BACKEND=il2cpp",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    assert params["method"] == "MXR.Builder.BuildEntryPoints.BuildQuest"
-                    assert "BUILD_TYPE=production" in params["env"]
-                    assert "SCRIPTING_BACKEND=il2cpp" in params["env"]
-                    command_id = "c3d4e5f6-a7b8-9012-cdef-012345678901"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "build",
-                                "duration_ms": 100,
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_build_with_profile(self, tmp_path):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Create build.json with profile
-            config = {
-                "profiles": {
-                    "quest": {
-                        "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
-                        "env": {"BUILD_TYPE": "development"},
-                        "timeout": 600,
-                    },
+    def test_main_build_direct(self, unity_dir):
+        argv = ["build", "--target", "Android", "--timeout", "1"]
+        response = _dumps(
+            {
+                "id": PLACEHOLDER_ID,
+                "status": "success",
+                "action": "build",
+                "duration_ms": 45000,
+                "buildInfo": {
+                    "buildResult": "Succeeded",
+                    "totalErrors": 0,
+                    "totalWarnings": 0,
+                    "totalSeconds": 45.0,
+                    "outputPath": "/path/to/build.apk",
+                    "sizeBytes": 50000000,
+                    "method": "direct",
                 },
             }
-            build_config = tmp_path / "build.json"
-            build_config.write_text(json.dumps(config))
-
-            argv = [
-                "unity-bridge",
-                "build",
-                "--profile",
-                "quest",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-
-                def mock_write(action, params):
-                    assert params["method"] == "MXR.Builder.BuildEntryPoints.BuildQuest"
-                    assert "BUILD_TYPE=development" in params["env"]
-                    command_id = "d4e5f6a7-b8c9-0123-defa-123456789012"
-                    response_file = tmp_path / f"response-{command_id}.json"
-                    response_file.write_text(
-                        json.dumps(
-                            {
-                                "id": command_id,
-                                "status": "success",
-                                "action": "build",
-                                "duration_ms": 100,
-                            }
-                        )
-                    )
-                    return command_id
-
-                with patch("claude_unity_bridge.cli.write_command", side_effect=mock_write):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
-
-    def test_main_build_unknown_profile(self, tmp_path, capsys):
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # Create build.json without the requested profile
-            config = {"profiles": {"quest": {"method": "SomeMethod"}}}
-            build_config = tmp_path / "build.json"
-            build_config.write_text(json.dumps(config))
-
-            argv = [
-                "unity-bridge",
-                "build",
-                "--profile",
-                "nonexistent",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-                exit_code = main()
-                assert exit_code == EXIT_ERROR
+        )
+        mock_write = _responding_write(unity_dir, COMMAND_ID, response)
+        with patch(
+            "claude_unity_bridge.cli.write_command", side_effect=mock_write
+        ) as mock_write_command:
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+        action, params = mock_write_command.call_args.args
+        assert action == "build"
+        assert params.get("target") == "Android"
+
+    def test_main_build_with_method(self, unity_dir):
+        argv = [
+            "build",
+            "--method",
+            "MXR.Builder.BuildEntryPoints.BuildQuest",
+            "--timeout",
+            "1",
+        ]
+        response = _dumps(
+            {
+                "id": PLACEHOLDER_ID,
+                "status": "success",
+                "action": "build",
+                "duration_ms": 120000,
+                "buildInfo": {
+                    "buildResult": "Succeeded",
+                    "totalErrors": 0,
+                    "totalWarnings": 0,
+                    "totalSeconds": 120.0,
+                    "outputPath": "",
+                    "sizeBytes": 0,
+                    "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
+                },
+            }
+        )
+        mock_write = _responding_write(unity_dir, COMMAND_ID, response)
+        with patch(
+            "claude_unity_bridge.cli.write_command", side_effect=mock_write
+        ) as mock_write_command:
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+        action, params = mock_write_command.call_args.args
+        assert action == "build"
+        assert params["method"] == "MXR.Builder.BuildEntryPoints.BuildQuest"
+
+    def test_main_build_with_env(self, unity_dir):
+        argv = [
+            "build",
+            "--method",
+            "MXR.Builder.BuildEntryPoints.BuildQuest",
+            "--env",
+            "BUILD_TYPE=production",
+            "--env",
+            "SCRIPTING_BACKEND=il2cpp",
+            "--timeout",
+            "1",
+        ]
+        mock_write = _responding_write(unity_dir, COMMAND_ID, SUCCESS_BUILD_JSON)
+        with patch(
+            "claude_unity_bridge.cli.write_command", side_effect=mock_write
+        ) as mock_write_command:
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+        params = mock_write_command.call_args.args[1]
+        assert params["method"] == "MXR.Builder.BuildEntryPoints.BuildQuest"
+        assert "BUILD_TYPE=production" in params["env"]
+        assert "SCRIPTING_BACKEND=il2cpp" in params["env"]
+
+    def test_main_build_with_profile(self, unity_dir):
+        # Create build.json with profile
+        config = {
+            "profiles": {
+                "quest": {
+                    "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
+                    "env": {"BUILD_TYPE": "development"},
+                    "timeout": 600,
+                },
+            },
+        }
+        build_config = unity_dir / "build.json"
+        _write_json(build_config, config)
+
+        argv = [
+            "build",
+            "--profile",
+            "quest",
+            "--timeout",
+            "1",
+        ]
+        mock_write = _responding_write(unity_dir, COMMAND_ID, SUCCESS_BUILD_JSON)
+        with patch(
+            "claude_unity_bridge.cli.write_command", side_effect=mock_write
+        ) as mock_write_command:
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+        params = mock_write_command.call_args.args[1]
+        assert params["method"] == "MXR.Builder.BuildEntryPoints.BuildQuest"
+        assert "BUILD_TYPE=development" in params["env"]
+
+    def test_main_build_unknown_profile(self, unity_dir, capsys):
+        # Create build.json without the requested profile
+        config = {"profiles": {"quest": {"method": "SomeMethod"}}}
+        build_config = unity_dir / "build.json"
+        _write_json(build_config, config)
+
+        argv = [
+            "build",
+            "--profile",
+            "nonexistent",
+            "--timeout",
+            "1",
+        ]
+        exit_code = main(argv)
+        assert exit_code == EXIT_ERROR
 
-            captured = capsys.readouterr()
-            assert "not found" in captured.err.lower() or "not found" in captured.out.lower()
+        captured = capsys.readouterr()
+        assert "not found" in captured.err.lower() or "not found" in captured.out.lower()
 
-    def test_main_build_profile_missing_config(self, tmp_path, capsys):
+    def test_main_build_profile_missing_config(self, unity_dir, capsys):
         """Error when --profile used but no build.json exists"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            # No build.json created in tmp_path
-            argv = [
-                "unity-bridge",
-                "build",
-                "--profile",
-                "quest",
-                "--timeout",
-                "1",
-            ]
-            with patch("sys.argv", argv):
-                exit_code = main()
-                assert exit_code == EXIT_ERROR
+        # No build.json created in unity_dir
+        argv = [
+            "build",
+            "--profile",
+            "quest",
+            "--timeout",
+            "1",
+        ]
+        exit_code = main(argv)
+        assert exit_code == EXIT_ERROR
 
-            captured = capsys.readouterr()
-            assert "build.json" in captured.err.lower()
+        captured = capsys.readouterr()
+        assert "build.json" in captured.err.lower()
 
-    def test_main_build_profile_timeout_override(self, tmp_path):
+    def test_main_build_profile_timeout_override(self, unity_dir):
         """Profile timeout is applied when user doesn't specify --timeout"""
-        with patch("claude_unity_bridge.cli.UNITY_DIR", tmp_path):
-            config = {
-                "profiles": {
-                    "quest": {
-                        "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
-                        "timeout": 600,
-                    },
+        config = {
+            "profiles": {
+                "quest": {
+                    "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
+                    "timeout": 600,
                 },
-            }
-            build_config = tmp_path / "build.json"
-            build_config.write_text(json.dumps(config))
+            },
+        }
+        build_config = unity_dir / "build.json"
+        _write_json(build_config, config)
 
-            # Note: NO --timeout argument, so default should be overridden by profile
-            argv = ["unity-bridge", "build", "--profile", "quest"]
-            with patch("sys.argv", argv):
+        # Note: NO --timeout argument, so default should be overridden by profile
+        argv = ["build", "--profile", "quest"]
 
-                def mock_execute(action, params, timeout, cleanup=False, verbose=False):
-                    assert timeout == 600, f"Expected profile timeout 600, got {timeout}"
-                    return "✓ Build Succeeded\nDuration: 1.00s"
+        def mock_execute(action, params, timeout, cleanup=False, verbose=False, **kwargs):
+            assert timeout == 600, f"Expected profile timeout 600, got {timeout}"
+            return "✓ Build Succeeded\nDuration: 1.00s"
 
-                with patch(
-                    "claude_unity_bridge.cli.execute_command",
-                    side_effect=mock_execute,
-                ):
-                    exit_code = main()
-                    assert exit_code == EXIT_SUCCESS
+        with patch(
+            "claude_unity_bridge.cli.execute_command",
+            side_effect=mock_execute,
+        ):
+            exit_code = main(argv)
+            assert exit_code == EXIT_SUCCESS
+
+
+class TestStartupImports:
+    """Test that the command path doesn't pay for install/update-only modules"""
+
+    @pytest.mark.slow
+    def test_import_skips_install_only_modules(self):
+        code = (
+            "import sys, claude_unity_bridge.cli; "
+            "print(sorted(m for m in ('argparse', 'shutil', 'subprocess') if m in sys.modules))"
+        )
+        src_dir = Path(__file__).resolve().parent.parent / "src"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(src_dir)},
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_parser_built_once(self):
+        assert _build_parser() is _build_parser()
+
+    def test_reused_parser_does_not_leak_between_parses(self):
+        """Append-style options start empty on every parse of the cached parser"""
+        parser = _build_parser()
+        first = parser.parse_args(["build", "--env", "A=1", "--env", "B=2"])
+        second = parser.parse_args(["build"])
+
+        assert first.env == ["A=1", "B=2"]
+        assert second.env is None
+        assert parser.parse_args(["build", "--env", "C=3"]).env == ["C=3"]
+
+    def test_bare_command_skips_argument_parsing(self):
+        with patch("claude_unity_bridge.cli._build_parser") as mock_parser:
+            with patch(
+                "claude_unity_bridge.cli.execute_command", return_value="ok"
+            ) as mock_execute:
+                assert main(["compile"]) == EXIT_SUCCESS
+
+        mock_parser.assert_not_called()
+        kwargs = mock_execute.call_args.kwargs
+        assert kwargs["action"] == "compile"
+        assert kwargs["params"] == {}
+        assert kwargs["timeout"] == DEFAULT_TIMEOUT
+
+    def test_main_defaults_to_sys_argv(self):
+        """The console script calls main() with no arguments"""
+        with patch("sys.argv", ["unity-bridge", "get-status", "--timeout", "5"]):
+            with patch(
+                "claude_unity_bridge.cli.execute_command", return_value="ok"
+            ) as mock_execute:
+                assert main() == EXIT_SUCCESS
+
+        assert mock_execute.call_args.kwargs["timeout"] == 5
+
+    def test_main_passes_json_flag(self):
+        with patch("claude_unity_bridge.cli.execute_command", return_value="{}") as mock_execute:
+            assert main(["get-status", "--json"]) == EXIT_SUCCESS
+
+        assert mock_execute.call_args.kwargs["json_output"] is True
+
+    def test_command_with_options_uses_parser(self):
+        with patch("claude_unity_bridge.cli.execute_command", return_value="ok") as mock_execute:
+            assert main(["compile", "--timeout", "5"]) == EXIT_SUCCESS
+
+        assert mock_execute.call_args.kwargs["timeout"] == 5
+
+    def test_unity_dir_resolved_on_first_use(self, tmp_path, monkeypatch):
+        monkeypatch.delitem(vars(cli), "UNITY_DIR", raising=False)
+        monkeypatch.chdir(tmp_path)
+
+        assert "UNITY_DIR" not in vars(cli)
+        assert cli.UNITY_DIR == tmp_path / ".unity-bridge"
+        assert vars(cli)["UNITY_DIR"] == tmp_path / ".unity-bridge"
+        del vars(cli)["UNITY_DIR"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,514 @@
+"""
+Tests for Unity Bridge response formatting.
+
+These are pure string tests: no files, no patching.
+
+Run with: pytest skill/tests/test_formatters.py
+"""
+
+import io
+
+import pytest
+
+from claude_unity_bridge.cli import (
+    format_response,
+    format_test_results,
+    format_compile_results,
+    format_console_logs,
+    format_editor_status,
+    format_refresh_results,
+    format_play_mode_result,
+    format_build_results,
+    format_generic_response,
+    write_response,
+)
+
+
+def _assert_contains_all(text, *fragments):
+    """Assert every fragment appears in text, reporting all that are missing at once."""
+    missing = [fragment for fragment in fragments if fragment not in text]
+    assert not missing, f"missing: {missing}\n---\n{text}"
+
+
+# editorStatus payloads, built once and shared read-only across tests
+READY = {"isCompiling": False, "isUpdating": False, "isPlaying": False, "isPaused": False}
+COMPILING = {**READY, "isCompiling": True}
+UPDATING = {**READY, "isUpdating": True}
+PLAYING = {**READY, "isPlaying": True}
+PAUSED = {**PLAYING, "isPaused": True}
+
+
+class TestFormatTestResults:
+    """Test formatting of test results"""
+
+    def test_all_tests_passed(self):
+        response = {
+            "status": "success",
+            "result": {"passed": 410, "failed": 0, "skipped": 0, "failures": []},
+        }
+        result = format_test_results(response, "success", 1.25)
+
+        _assert_contains_all(
+            result,
+            "✓ Tests Passed: 410",
+            "✗ Tests Failed: 0",
+            "○ Tests Skipped: 0",
+            "Duration: 1.25s",
+        )
+        assert "Failed Tests:" not in result
+
+    def test_tests_with_failures(self):
+        response = {
+            "status": "failure",
+            "result": {
+                "passed": 408,
+                "failed": 2,
+                "skipped": 1,
+                "failures": [
+                    {
+                        "name": "MXR.Tests.AuthTests.LoginTest",
+                        "message": "Expected: success\nActual: failure",
+                    },
+                    {
+                        "name": "MXR.Tests.NetworkTests.TimeoutTest",
+                        "message": "NullReferenceException",
+                    },
+                ],
+            },
+        }
+        result = format_test_results(response, "failure", 3.5)
+
+        _assert_contains_all(
+            result,
+            "✓ Tests Passed: 408",
+            "✗ Tests Failed: 2",
+            "○ Tests Skipped: 1",
+            "Failed Tests:",
+            "MXR.Tests.AuthTests.LoginTest",
+            "Expected: success",
+            "MXR.Tests.NetworkTests.TimeoutTest",
+        )
+
+
+class TestFormatStatusResults:
+    """Test the formatters that render a status, an optional error and a duration"""
+
+    @pytest.mark.parametrize(
+        "formatter, response, duration, expected",
+        [
+            (
+                format_compile_results,
+                {"status": "success"},
+                2.3,
+                ["✓ Compilation Successful", "Duration: 2.30s"],
+            ),
+            (
+                format_compile_results,
+                {
+                    "status": "failure",
+                    "error": "Assets/Scripts/Player.cs(25,10): "
+                    "error CS0103: The name 'invalidVar' does not exist",
+                },
+                1.8,
+                ["✗ Compilation Failed", "invalidVar"],
+            ),
+            (
+                format_compile_results,
+                {"status": "failure"},
+                1.0,
+                ["✗ Compilation Failed", "Duration: 1.00s"],
+            ),
+            (format_compile_results, {"status": "running"}, 0.5, ["Compilation Status: running"]),
+            (
+                format_refresh_results,
+                {"status": "success"},
+                0.5,
+                ["✓ Asset Database Refreshed", "Duration: 0.50s"],
+            ),
+            (
+                format_refresh_results,
+                {"status": "failure", "error": "Failed to refresh: I/O error"},
+                0.3,
+                ["✗ Refresh Failed", "I/O error"],
+            ),
+            (format_refresh_results, {"status": "running"}, 0.3, ["Refresh Status: running"]),
+            (
+                format_generic_response,
+                {"action": "custom-action", "status": "success"},
+                1.5,
+                ["✓ custom-action completed successfully", "Duration: 1.50s"],
+            ),
+            (
+                format_generic_response,
+                {"action": "custom-action", "status": "failure", "error": "Something broke"},
+                0.5,
+                ["✗ custom-action failed: Something broke"],
+            ),
+            (
+                format_generic_response,
+                {"action": "custom-action", "status": "pending"},
+                0.1,
+                ["custom-action status: pending"],
+            ),
+        ],
+        ids=[
+            "compile-success",
+            "compile-failure",
+            "compile-failure-no-error",
+            "compile-unknown-status",
+            "refresh-success",
+            "refresh-failure",
+            "refresh-unknown-status",
+            "generic-success",
+            "generic-failure",
+            "generic-unknown-status",
+        ],
+    )
+    def test_format_status_result(self, formatter, response, duration, expected):
+        result = formatter(response, response["status"], duration)
+
+        _assert_contains_all(result, *expected)
+
+
+class TestFormatConsoleLogs:
+    """Test formatting of console logs"""
+
+    def test_console_logs_with_errors(self):
+        response = {
+            "consoleLogs": [
+                {
+                    "message": "NullReferenceException: Object reference not set",
+                    "stackTrace": "Player.Update () (at Assets/Scripts/Player.cs:34)",
+                    "type": "Error",
+                    "count": 1,
+                },
+                {
+                    "message": "Shader compilation succeeded",
+                    "stackTrace": "",
+                    "type": "Log",
+                    "count": 3,
+                },
+            ]
+        }
+        result = format_console_logs(response)
+
+        _assert_contains_all(
+            result,
+            "Console Logs",
+            "[Error]",
+            "NullReferenceException",
+            "Player.Update",
+            "[Log] (x3)",
+            "Shader compilation succeeded",
+        )
+
+    def test_console_logs_crlf_stack_trace(self):
+        response = {
+            "consoleLogs": [
+                {
+                    "message": "Boom",
+                    "stackTrace": "Foo.Bar ()\r\n\r\nFoo.Baz ()\r\n",
+                    "type": "Error",
+                }
+            ]
+        }
+        result = format_console_logs(response)
+
+        assert result == "Console Logs (last 1):\n\n[Error] Boom\n  Foo.Bar ()\n  Foo.Baz ()\n"
+
+    def test_console_logs_empty(self):
+        response = {"consoleLogs": []}
+        result = format_console_logs(response)
+
+        assert "No console logs found" in result
+
+    def test_write_response_streams_console_logs(self):
+        """Streamed console logs match the formatted string printed by main"""
+        response = {
+            "status": "success",
+            "consoleLogs": [
+                {"message": "Boom", "stackTrace": "Foo.Bar ()\nFoo.Baz ()", "type": "Error"},
+                {"message": "Hello", "stackTrace": "", "type": "Log", "count": 2},
+            ],
+        }
+        out = io.StringIO()
+        write_response(response, "get-console-logs", out)
+
+        assert out.getvalue() == format_response(response, "get-console-logs") + "\n"
+
+    def test_write_response_other_actions(self):
+        for response, action in [
+            ({"status": "success", "consoleLogs": []}, "get-console-logs"),
+            ({"status": "error", "error": "Nope", "consoleLogs": [{}]}, "get-console-logs"),
+            ({"status": "success", "duration_ms": 100}, "compile"),
+            (
+                {
+                    "status": "failure",
+                    "duration_ms": 1500,
+                    "result": {
+                        "passed": 1,
+                        "failed": 1,
+                        "failures": [{"name": "T.Fails", "message": "Expected 1"}],
+                    },
+                },
+                "run-tests",
+            ),
+            ({"status": "error", "error": "Nope"}, "run-tests"),
+        ]:
+            out = io.StringIO()
+            write_response(response, action, out)
+            assert out.getvalue() == format_response(response, action) + "\n"
+
+
+class TestFormatEditorStatus:
+    """Test formatting of editor status"""
+
+    @pytest.mark.parametrize(
+        "editor_status, expected",
+        [
+            (READY, ["Unity Editor Status:", "✓ Ready", "✏ Editing"]),
+            (COMPILING, ["⏳ Compiling..."]),
+            (UPDATING, ["⏳ Yes"]),
+            (PLAYING, ["▶ Playing"]),
+            (PAUSED, ["⏸ Paused"]),
+        ],
+    )
+    def test_editor_state(self, editor_status, expected):
+        result = format_editor_status({"editorStatus": editor_status})
+
+        _assert_contains_all(result, *expected)
+
+    @pytest.mark.parametrize("response", [{}, {"status": "success"}])
+    def test_editor_status_missing(self, response):
+        """Test response when editorStatus field is missing"""
+        assert "Unknown" in format_editor_status(response)
+
+
+class TestFormatPlayModeResult:
+    """Test formatting of play/pause/step results"""
+
+    @pytest.mark.parametrize(
+        "action, editor_status, duration, expected",
+        [
+            ("play", PLAYING, 0.01, ["▶ Playing", "Duration: 0.01s"]),
+            ("play", READY, 0.01, ["⏹ Stopped"]),
+            ("pause", PAUSED, 0.01, ["⏸ Paused"]),
+            ("pause", PLAYING, 0.01, ["▶ Playing"]),
+            ("step", PAUSED, 0.02, ["⏸ Paused", "Duration: 0.02s"]),
+        ],
+        ids=["enter-play", "exit-play", "pause", "unpause", "step"],
+    )
+    def test_play_mode_success(self, action, editor_status, duration, expected):
+        response = {"action": action, "status": "success", "editorStatus": editor_status}
+        result = format_play_mode_result(response, "success", duration)
+
+        _assert_contains_all(result, f"✓ {action} completed", *expected)
+
+    def test_failure_response(self):
+        response = {
+            "action": "pause",
+            "status": "failure",
+            "error": "Cannot pause: not in play mode",
+        }
+        result = format_play_mode_result(response, "failure", 0.01)
+
+        assert "✗ pause failed" in result
+        assert "Cannot pause: not in play mode" in result
+
+    def test_missing_editor_status_falls_through(self):
+        response = {
+            "action": "play",
+            "status": "success",
+        }
+        result = format_play_mode_result(response, "success", 0.01)
+
+        # Should fall through to generic formatting
+        assert "play completed successfully" in result
+
+
+class TestFormatBuildResults:
+    """Test formatting of build results"""
+
+    def test_direct_build_success(self):
+        response = {
+            "status": "success",
+            "buildInfo": {
+                "buildResult": "Succeeded",
+                "totalErrors": 0,
+                "totalWarnings": 3,
+                "totalSeconds": 45.2,
+                "outputPath": "/path/to/Build_Android.apk",
+                "sizeBytes": 123456789,
+                "method": "direct",
+            },
+        }
+        result = format_build_results(response, "success", 45.5)
+
+        _assert_contains_all(
+            result,
+            "Build Succeeded",
+            "Errors: 0",
+            "Warnings: 3",
+            "Build Time: 45.2s",
+            "Output: /path/to/Build_Android.apk",
+            "Size:",
+            "Duration: 45.50s",
+        )
+
+    def test_method_build_success(self):
+        response = {
+            "status": "success",
+            "buildInfo": {
+                "buildResult": "Succeeded",
+                "totalErrors": 0,
+                "totalWarnings": 0,
+                "totalSeconds": 120.5,
+                "outputPath": "",
+                "sizeBytes": 0,
+                "method": "MXR.Builder.BuildEntryPoints.BuildQuest",
+            },
+        }
+        result = format_build_results(response, "success", 121.0)
+
+        assert "Build Succeeded" in result
+        assert "Method: MXR.Builder.BuildEntryPoints.BuildQuest" in result
+        assert "Build Time: 120.5s" in result
+
+    def test_build_failure(self):
+        response = {
+            "status": "failure",
+            "error": "Build Failed: 5 error(s), 2 warning(s)",
+            "buildInfo": {
+                "buildResult": "Failed",
+                "totalErrors": 5,
+                "totalWarnings": 2,
+                "totalSeconds": 30.0,
+                "outputPath": "",
+                "sizeBytes": 0,
+                "method": "direct",
+            },
+        }
+        result = format_build_results(response, "failure", 30.5)
+
+        assert "Build Failed" in result
+        assert "Errors: 5" in result
+        assert "Warnings: 2" in result
+
+    def test_build_no_build_info(self):
+        """Falls back to generic format when buildInfo is missing"""
+        response = {
+            "status": "success",
+        }
+        result = format_build_results(response, "success", 10.0)
+
+        assert "Build Succeeded" in result
+        assert "Duration: 10.00s" in result
+
+    def test_build_size_formatting(self):
+        response = {
+            "status": "success",
+            "buildInfo": {
+                "buildResult": "Succeeded",
+                "totalErrors": 0,
+                "totalWarnings": 0,
+                "totalSeconds": 10.0,
+                "outputPath": "/path/to/build",
+                "sizeBytes": 52428800,
+                "method": "direct",
+            },
+        }
+        result = format_build_results(response, "success", 10.0)
+
+        assert "50.0 MB" in result
+
+
+class TestFormatResponseBranches:
+    """Test format_response routing to different formatters"""
+
+    @pytest.mark.parametrize(
+        "response, action, expected",
+        [
+            ({"status": "success", "duration_ms": 1000}, "compile", ["Compilation Successful"]),
+            (
+                {"status": "error", "error": "Cannot compile while Unity is updating"},
+                "compile",
+                ["✗ Error:", "Cannot compile while Unity is updating"],
+            ),
+            (
+                {
+                    "status": "success",
+                    "duration_ms": 1250,
+                    "result": {"passed": 10, "failed": 0, "skipped": 0, "failures": []},
+                },
+                "run-tests",
+                ["✓ Tests Passed: 10"],
+            ),
+            ({"consoleLogs": []}, "get-console-logs", ["No console logs found"]),
+            ({"status": "success", "duration_ms": 500}, "refresh", ["Asset Database Refreshed"]),
+            (
+                {"status": "success", "action": "play", "editorStatus": PLAYING},
+                "play",
+                ["play completed", "▶ Playing"],
+            ),
+            (
+                {"status": "success", "action": "pause", "editorStatus": PAUSED},
+                "pause",
+                ["pause completed", "⏸ Paused"],
+            ),
+            (
+                {"status": "success", "action": "step", "editorStatus": PAUSED},
+                "step",
+                ["step completed"],
+            ),
+            (
+                {"status": "error", "error": "Cannot pause: Unity Editor is not in Play Mode."},
+                "pause",
+                ["✗ Error:", "not in Play Mode"],
+            ),
+            (
+                {"status": "success", "duration_ms": 100},
+                "unknown-action",
+                ["completed successfully"],
+            ),
+        ],
+        ids=[
+            "compile",
+            "compile-error",
+            "run-tests",
+            "console-logs",
+            "refresh",
+            "play",
+            "pause",
+            "step",
+            "pause-error",
+            "unknown-action",
+        ],
+    )
+    def test_format_routing(self, response, action, expected):
+        _assert_contains_all(format_response(response, action), *expected)
+
+
+class TestFormatConsoleLogsEdgeCases:
+    """Test console logs formatting edge cases"""
+
+    def test_console_logs_with_warning(self):
+        response = {
+            "consoleLogs": [
+                {
+                    "message": "Deprecated API usage",
+                    "stackTrace": "",
+                    "type": "Warning",
+                    "count": 1,
+                }
+            ]
+        }
+        result = format_console_logs(response)
+        assert "[Warning]" in result
+
+    def test_console_logs_with_filter(self):
+        response = {
+            "consoleLogs": [{"message": "test", "type": "Error", "stackTrace": "", "count": 1}],
+            "params": {"filter": "Error"},
+        }
+        result = format_console_logs(response)
+        assert "filtered by Error" in result